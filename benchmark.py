@@ -0,0 +1,188 @@
+"""Benchmarks for the search, parse and inventory paths on synthetic catalogs.
+
+    python benchmark.py --sizes 20000 100000 500000 --output bench.json
+    python benchmark.py --compare bench.json
+    python benchmark.py --sizes 500000 --scaling 1 2 4 8
+
+Results are written as JSON so runs can be compared. With --compare, every
+timing is printed next to the same benchmark from an earlier run. With
+--scaling, the sharded fuzzy scorer is also timed at each process count.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from difflib import get_close_matches
+
+import pandas as pd
+
+from catalog import Catalog
+from deck import DeckResolver, parse_deck
+from inventory import add_card, load_inventory, inventory_row, owned_counts
+from parallel_scoring import ShardedNameScorer
+from search import CardSearchEngine, custom_parser, similar_name, sort_cards, card_record
+from synthetic_catalog import generate_catalog, generate_inventory
+
+QUERIES = ['Charizard', 'pikachu v', 'Radiant Dragonite', 'Mewtwo VSTAR', '25', '25/102', 'Snorlaxgar ex']
+# Misspellings that no name contains, so every one goes through the close-match fallback
+FUZZY_QUERIES = ['Charizrd', 'Pikachoo vmax', 'Dragonitte', 'Mewtoo GX', 'Snorlacks']
+
+
+def measure(function, repeat):
+    """Runs `function` `repeat` times and returns its timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def peak_allocation(function):
+    """Returns the peak memory in KiB allocated while `function` runs."""
+    tracemalloc.start()
+    try:
+        function()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def result(name, size, timings, **extra):
+    return dict(name=name, size=size, runs=len(timings), min_ms=round(min(timings), 3),
+                median_ms=round(statistics.median(timings), 3), mean_ms=round(statistics.fmean(timings), 3), **extra)
+
+
+def catalog_benchmarks(size, repeat):
+    """Benchmarks the search and parse paths against a catalog of `size` cards."""
+    df = generate_catalog(size)
+    catalog = Catalog(df)
+    start = time.perf_counter()
+    engine = CardSearchEngine(catalog)
+    table_ms = (time.perf_counter() - start) * 1000
+    names = engine.names()
+    records = df.to_dict(orient='records')
+    candidates = records[:500]
+    tcgplayer = df['tcgplayer'].tolist()[:1000]
+    results = [result('card_table', size, [table_ms], table_kib=round(engine.table.nbytes() / 1024, 1))]
+
+    results.append(result('similar_name', size, measure(lambda: [similar_name(query, names) for query in QUERIES], repeat),
+                          per='query set'))
+    results.append(result('sort_cards', size, measure(lambda: sorted(candidates, key=lambda card: sort_cards(card, 'Charizard')), repeat),
+                          per='500 candidates'))
+    results.append(result('custom_parser', size, measure(lambda: [custom_parser(value) for value in tcgplayer], repeat),
+                          per='1000 rows'))
+    results.append(result('card_record', size, measure(lambda: [card_record(card, 'Holofoil') for card in candidates[:20]], repeat),
+                          per='20 rows'))
+
+    def first_page(query):
+        # A cold search: without this every run after the first would time the cached order of the last search
+        engine.clear_cache()
+        return engine.search(query, 'Normal', 0, 20)
+    for query in QUERIES:
+        results.append(result('search_card', size, measure(lambda: first_page(query), repeat),
+                              query=query, matches=len(engine.rank(query)), peak_kib=peak_allocation(lambda: first_page(query))))
+    # Five pages per query sorted by price: the first page sorts every match, the next four reuse the cached order
+    results.append(result('sorted_pages', size, measure(lambda: [engine.search(query, 'Holofoil', page, 20, sort_by='market')
+                                                                 for query in QUERIES for page in range(5)], repeat),
+                          per='query set, 5 pages each'))
+    return df, results
+
+def scoring_benchmarks(size, process_counts, repeat):
+    """Times close-match scoring of the name table serially and sharded over each process count."""
+    names = CardSearchEngine(Catalog(generate_catalog(size))).names()
+    lowered = [name.lower() for name in names]
+    serial = [get_close_matches(query.lower(), lowered, n=10) for query in FUZZY_QUERIES]
+    results = [result('close_matches', size, measure(lambda: [get_close_matches(query.lower(), lowered, n=10)
+                                                              for query in FUZZY_QUERIES], repeat),
+                      per='query set', names=len(names), processes=0)]
+    for processes in process_counts:
+        with ShardedNameScorer(names, processes) as scorer:
+            sharded = [scorer.close_matches(query.lower(), n=10) for query in FUZZY_QUERIES]  # Also warms the workers
+            if sharded != serial:
+                raise AssertionError(f"sharded scoring with {processes} processes differs from the serial path")
+            results.append(result('close_matches', size, measure(lambda: [scorer.close_matches(query.lower(), n=10)
+                                                                          for query in FUZZY_QUERIES], repeat),
+                                  per='query set', names=len(names), processes=processes))
+    return results
+
+def inventory_benchmarks(catalog_df, size, repeat):
+    """Benchmarks loading an inventory of `size` lines, adding a card to it and checking a deck against it."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'inventory.xlsx')
+        inventory = generate_inventory(catalog_df, size)
+        inventory.to_excel(path, index=False)
+        card = inventory_row(card_record(catalog_df.iloc[0].to_dict(), 'Holofoil'))
+
+        results.append(result('load_inventory', size, measure(lambda: load_inventory(path), repeat)))
+        results.append(result('add_to_collection', size, measure(lambda: add_card(path, card), repeat)))
+
+    # A 60-card deck: 15 printings by set and number, 4 copies each
+    sample = catalog_df.sample(n=15, random_state=size)
+    deck_list = "\n".join(f"4 {card['name']} {card['id'].split('-')[0]} {card['number']}" for _, card in sample.iterrows())
+    resolver = DeckResolver(Catalog(catalog_df))
+    owned = owned_counts(inventory)
+    entries = parse_deck(deck_list)
+    results.append(result('deck_check', size, measure(lambda: resolver.check(entries, owned), repeat), per='60 cards'))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['size'], r.get('query'), r.get('processes')): r for r in json.load(f)['results']}
+    print(f"{'benchmark':<40}{'size':>8}{'before ms':>12}{'after ms':>12}{'ratio':>8}")
+    for r in results:
+        old = baseline.get((r['name'], r['size'], r.get('query'), r.get('processes')))
+        if not old:
+            continue
+        ratio = r['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        label = r['name'] + (f" [{r['query']}]" if r.get('query') else '') + \
+            (f" [{r['processes']} processes]" if r.get('processes') is not None else '')
+        print(f"{label:<40}{r['size']:>8}{old['median_ms']:>12.2f}{r['median_ms']:>12.2f}{ratio:>8.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CardLog on synthetic catalogs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000, 500000], help="catalog sizes")
+    parser.add_argument('--inventory-sizes', type=int, nargs='+', default=[1000, 10000], help="inventory sizes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scaling', type=int, nargs='+', default=[],
+                        help="process counts to time the sharded fuzzy scorer at, for each catalog size")
+    parser.add_argument('--output', help="write the results to this JSON file (default: stdout)")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2, help="ratio above which a benchmark is flagged")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = []
+    catalog_df = None
+    for size in args.sizes:
+        catalog_df, catalog_results = catalog_benchmarks(size, args.repeat)
+        results += catalog_results
+        if args.scaling:
+            results += scoring_benchmarks(size, args.scaling, args.repeat)
+    for size in args.inventory_sizes:
+        results += inventory_benchmarks(catalog_df, size, args.repeat)
+
+    report = {
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                 'pandas': pd.__version__, 'machine': platform.machine(), 'processor': platform.processor(),
+                 'cpus': os.cpu_count(), 'repeat': args.repeat},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
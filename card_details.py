@@ -0,0 +1,121 @@
+"""On-demand access to the catalog columns the search never touches.
+
+The app only keeps the hot columns of the catalog in memory. Rules text,
+attacks, abilities and the like are copied once into a Parquet file next to
+the catalog (sorted by id, small row groups) and read back one card at a
+time when the detail pane asks for them. The copy is rebuilt whenever the
+catalog file is newer than it.
+"""
+import ast
+import logging
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from catalog import DETAIL_COLUMNS
+
+ROW_GROUP_SIZE = 1024
+# Columns holding SDK object or list reprs rather than plain text
+REPR_COLUMNS = ['abilities', 'ancientTrait', 'attacks', 'legalities', 'nationalPokedexNumbers', 'resistances',
+                'retreatCost', 'rules', 'subtypes', 'types', 'weaknesses', 'cardmarket']
+
+
+def details_path(catalog_path):
+    return os.path.splitext(catalog_path)[0] + '.details.parquet'
+
+def repr_value(node):
+    # SDK objects become dicts of their fields, everything else must be a literal
+    if isinstance(node, ast.Call):
+        return {keyword.arg: repr_value(keyword.value) for keyword in node.keywords}
+    if isinstance(node, ast.List):
+        return [repr_value(item) for item in node.elts]
+    return ast.literal_eval(node)
+
+def parse_repr(value):
+    """Turns a stored repr such as "[Attack(name='Ember', cost=['Fire'], ...)]" back into lists and dicts."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return repr_value(ast.parse(value, mode='eval').body)
+    except (SyntaxError, ValueError):
+        return value
+
+
+class CardDetails:
+    """Cold catalog columns, read one card at a time from a Parquet copy of the catalog."""
+    def __init__(self, catalog_path):
+        self.catalog_path = catalog_path
+        self.path = details_path(catalog_path)
+        self.cache = {}
+
+    def is_current(self):
+        return os.path.exists(self.path) and os.path.getmtime(self.path) >= os.path.getmtime(self.catalog_path)
+
+    def build(self):
+        """Copies the detail columns of the catalog into the Parquet store."""
+        logging.info('Building the card detail store %s.', self.path)
+        df = pd.read_excel(self.catalog_path, usecols=lambda column: column == 'id' or column in DETAIL_COLUMNS)
+        df = df.sort_values('id', kind='stable')
+        # Store everything as text; the columns mix numbers, strings and reprs
+        columns = {column: [None if pd.isna(value) else str(value) for value in df[column]] for column in df.columns}
+        table = pa.table({column: pa.array(values, pa.string()) for column, values in columns.items()})
+        pq.write_table(table, self.path + '.tmp', row_group_size=ROW_GROUP_SIZE, compression='zstd')
+        os.replace(self.path + '.tmp', self.path)
+        self.cache = {}
+
+    def details(self, card_id):
+        """Returns {column: value} with the repr columns parsed, or None if the card isn't in the catalog."""
+        if card_id in self.cache:
+            return self.cache[card_id]
+        if not self.is_current():
+            self.build()
+        rows = pq.read_table(self.path, filters=[('id', '==', card_id)]).to_pylist()
+        details = {column: parse_repr(value) if column in REPR_COLUMNS else value
+                   for column, value in rows[0].items()} if rows else None
+        self.cache[card_id] = details
+        return details
+
+
+def format_details(card, details):
+    """Plain-text detail pane contents for a result record and its details."""
+    lines = [f"{card['name']}  ({card['id']})", f"{card['set_name']}, {card['release_date']}"]
+    if not details:
+        return "\n".join(lines + ["", "No details available."])
+
+    header = [details.get('rarity'), details.get('supertype')]
+    if details.get('subtypes'):
+        header.append(" ".join(details['subtypes']))
+    if details.get('hp'):
+        header.append(f"HP {details['hp']}")
+    if details.get('types'):
+        header.append("/".join(details['types']))
+    lines.append(" - ".join(str(part) for part in header if part))
+
+    if details.get('evolvesFrom'):
+        lines.append(f"Evolves from {details['evolvesFrom']}")
+    for ability in details.get('abilities') or []:
+        lines += ["", f"{ability.get('type', 'Ability')}: {ability.get('name')}", str(ability.get('text') or '')]
+    for attack in details.get('attacks') or []:
+        cost = "".join(f"[{energy}]" for energy in attack.get('cost') or [])
+        damage = f"  {attack['damage']}" if attack.get('damage') else ""
+        lines += ["", f"{cost} {attack.get('name')}{damage}".strip()]
+        if attack.get('text'):
+            lines.append(str(attack['text']))
+    for rule in details.get('rules') or []:
+        lines += ["", str(rule)]
+
+    stats = []
+    for label, column in [('Weakness', 'weaknesses'), ('Resistance', 'resistances')]:
+        if details.get(column):
+            stats.append(f"{label}: " + ", ".join(f"{entry.get('type')} {entry.get('value')}" for entry in details[column]))
+    if details.get('retreatCost'):
+        stats.append(f"Retreat: {len(details['retreatCost'])}")
+    if stats:
+        lines += [""] + stats
+    if details.get('flavorText'):
+        lines += ["", str(details['flavorText'])]
+    if details.get('artist'):
+        lines.append(f"Illus. {details['artist']}")
+    return "\n".join(lines)
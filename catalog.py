@@ -0,0 +1,310 @@
+"""Layout of the card catalog shared by the ingest pipeline and the app."""
+import bisect
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+CATALOG_FILE = "C:/Users/josep/Dropbox/Babcanec Works/Programming/pokemon/pokemon_card_data.xlsx"
+
+# TCGplayer finishes and the price fields reported for each of them
+FINISHES = ['normal', 'holofoil', 'reverseHolofoil', 'firstEditionHolofoil', 'firstEditionNormal']
+PRICE_FIELDS = ['low', 'mid', 'high', 'market', 'directLow']
+
+# Inventory 'Card Type' labels (the card type buttons) and the finish they are priced as
+CARD_TYPES = {
+    'Normal': 'normal',
+    'Holofoil': 'holofoil',
+    'Reverse Holofoil': 'reverseHolofoil',
+    '1st Ed Holofoil': 'firstEditionHolofoil',
+    '1st Ed Normal': 'firstEditionNormal',
+}
+
+def price_column(finish, field):
+    return f"tcgplayer_{finish}_{field}"
+
+# Bits of Catalog.finish_masks(): one per finish the card has a low, mid, high or market price in,
+# and one for cards with no price data at all, whose finishes are unknown rather than missing
+FINISH_BITS = {finish: 1 << position for position, finish in enumerate(FINISHES)}
+NO_PRICE_DATA = 1 << 7
+
+# Flat columns written next to the SDK's repr columns so nested values can be read without regex parsing
+FLAT_COLUMNS = [
+    'set_id', 'set_name', 'set_series', 'set_printedTotal', 'set_releaseDate',
+    'images_small', 'images_large',
+    'tcgplayer_url', 'tcgplayer_updatedAt',
+] + [price_column(finish, field) for finish in FINISHES for field in PRICE_FIELDS]
+PRICE_COLUMNS = [price_column(finish, field) for finish in FINISHES for field in PRICE_FIELDS]
+
+# Columns the search, pricing and results need; everything else stays on disk until a card's details are shown
+HOT_COLUMNS = ['id', 'name', 'number', 'rarity', 'supertype', 'types', 'set', 'images', 'tcgplayer'] + FLAT_COLUMNS
+DETAIL_COLUMNS = ['supertype', 'subtypes', 'hp', 'types', 'evolvesFrom', 'rarity', 'abilities', 'ancientTrait', 'attacks',
+                  'rules', 'weaknesses', 'resistances', 'retreatCost', 'convertedRetreatCost', 'regulationMark',
+                  'legalities', 'nationalPokedexNumbers', 'flavorText', 'artist']
+
+# Fields of the Set(...) repr in the 'set' column
+SET_NAME_PATTERN = r"name=(['\"])(.*?)\1(?=[, ])"
+RELEASE_DATE_PATTERN = r"releaseDate='(.*?)'"
+SERIES_PATTERN = r"series='(.*?)'"
+
+
+def extract_prices(tcgplayer):
+    """Parses a Series of TCGPlayer(...) repr strings into one float column per finish and field."""
+    tcgplayer = tcgplayer.where(tcgplayer.map(lambda value: isinstance(value, str)))
+    columns = {}
+    for finish in FINISHES:
+        block = tcgplayer.str.extract(rf"(?<![A-Za-z]){finish}\s*=\s*TCGPrice\((.*?)\)", expand=False)
+        for field in PRICE_FIELDS:
+            value = block.str.extract(rf"(?<![A-Za-z]){field}=([\d.]+)", expand=False)
+            columns[price_column(finish, field)] = pd.to_numeric(value, errors='coerce')
+    return pd.DataFrame(columns, index=tcgplayer.index)
+
+
+class Catalog:
+    """The card catalog with derived columns parsed once, in bulk, instead of per card.
+
+    A catalog opened from a shared store (see shared_catalog) starts from its
+    memory-mapped CardTable and prices; `df` is only built if something asks for it.
+    """
+    def __init__(self, df=None, path=None, card_table=None, prices=None):
+        self._df = df
+        self.path = path  # The catalog file, which the card details are read from
+        if df is not None and 'printedTotal' not in df.columns:
+            # Extracting the printedTotal value from the 'set' column using regex
+            if 'set_printedTotal' in df.columns:
+                df['printedTotal'] = df['set_printedTotal'].astype(int)
+            else:
+                df['printedTotal'] = df['set'].str.extract(r'printedTotal=(\d+),')[0].astype(int)
+        self._prices = prices
+        self._price_matrix = None
+        self._finish_masks = None
+        self._finish_exists = {}
+        self._price_values = {}
+        self._set_names = None
+        self._card_table = card_table
+        self._details = None
+
+    @classmethod
+    def load(cls, path=CATALOG_FILE, columns=HOT_COLUMNS, shared=True):
+        """Reads the catalog, keeping only `columns` (all of them if None).
+
+        With the default columns and `shared`, the catalog is opened from its
+        memory-mapped store when that is up to date, and the store is written
+        after a fresh read so the next instance can map it.
+        """
+        if shared and columns == HOT_COLUMNS:
+            import shared_catalog
+            catalog = shared_catalog.open_store(path)
+            if catalog is not None:
+                return catalog
+        usecols = None if columns is None else (lambda column: column in columns)
+        catalog = cls(pd.read_excel(path, usecols=usecols), path)
+        if shared and columns == HOT_COLUMNS:
+            shared_catalog.save_store(catalog)
+        return catalog
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = self._card_table.frame()
+        return self._df
+
+    def __len__(self):
+        return len(self._df) if self._df is not None else len(self._card_table)
+
+    def ids(self):
+        """Card IDs in row order."""
+        if self._df is not None:
+            return self._df['id'].to_numpy()
+        return np.array(list(self._card_table.ids), dtype=object)
+
+    def prices(self):
+        """Wide float price table aligned with `df`, read from the flat columns when the catalog has them."""
+        if self._prices is None:
+            if all(column in self.df.columns for column in PRICE_COLUMNS):
+                self._prices = self.df[PRICE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+            else:
+                self._prices = extract_prices(self.df['tcgplayer'])
+        return self._prices
+
+    def price_values(self, finish, field):
+        """One price column as a float array, NaN where there is no price; made once and shared by every caller."""
+        key = (finish, field)
+        if key not in self._price_values:
+            self._price_values[key] = self.prices()[price_column(finish, field)].to_numpy(dtype=float)
+        return self._price_values[key]
+
+    def finish_masks(self):
+        """uint8 per card of the finishes it exists in, as FINISH_BITS, or NO_PRICE_DATA."""
+        if self._finish_masks is None:
+            prices = self.prices()
+            masks = np.zeros(len(prices), dtype=np.uint8)
+            for finish, bit in FINISH_BITS.items():
+                columns = [price_column(finish, field) for field in ('low', 'mid', 'high', 'market')]
+                masks[prices[columns].notna().any(axis=1).to_numpy()] |= bit
+            masks[prices[PRICE_COLUMNS].isna().all(axis=1).to_numpy()] = NO_PRICE_DATA
+            self._finish_masks = masks
+        return self._finish_masks
+
+    def finish_exists_mask(self, finish):
+        """Bool per card of whether it exists in a finish; a card without any price data may be in any of them."""
+        if finish not in self._finish_exists:
+            self._finish_exists[finish] = (self.finish_masks() & (FINISH_BITS[finish] | NO_PRICE_DATA)) != 0
+        return self._finish_exists[finish]
+
+    def finish_exists(self, row, finish):
+        """finish_exists_mask() of the card at a row."""
+        return bool(self.finish_exists_mask(finish)[row])
+
+    def set_names(self):
+        if self._set_names is None:
+            if self._df is None:
+                table = self._card_table
+                self._set_names = pd.Series(np.array(table.set_names, dtype=object)[table.set_codes])
+            elif 'set_name' in self.df.columns:
+                self._set_names = self.df['set_name']
+            else:
+                self._set_names = self.df['set'].str.extract(SET_NAME_PATTERN)[1].fillna("Unknown Set")
+        return self._set_names
+
+    def details(self):
+        """The CardDetails store for the cold columns, or None for a catalog not read from a file."""
+        if self._details is None and self.path is not None:
+            from card_details import CardDetails
+            self._details = CardDetails(self.path)
+        return self._details
+
+    def card_table(self):
+        if self._card_table is None:
+            self._card_table = CardTable(self.df)
+        return self._card_table
+
+    def price_matrix(self):
+        """Long price table with one row per (id, finish) that has any price data."""
+        if self._price_matrix is None:
+            prices = self.prices()
+            frames = []
+            for finish in FINISHES:
+                frame = pd.DataFrame({field: prices[price_column(finish, field)].to_numpy() for field in PRICE_FIELDS})
+                frame.insert(0, 'finish', finish)
+                frame.insert(0, 'id', self.ids())
+                frames.append(frame[frame[PRICE_FIELDS].notna().any(axis=1)])
+            self._price_matrix = pd.concat(frames, ignore_index=True).drop_duplicates(['id', 'finish'])
+        return self._price_matrix
+
+
+def factorize(values):
+    """Returns (int32 codes, list of interned unique values) for a column."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes.astype(np.int32), [sys.intern(value) if isinstance(value, str) else value for value in uniques]
+
+
+def type_masks(types):
+    """Returns (uint32 bitmask per row, type names) for a column of "['Fire', 'Water']" reprs."""
+    lists = [re.findall(r"'([^']+)'", value) if isinstance(value, str) else [] for value in types]
+    names = sorted({name for row in lists for name in row})[:32]
+    bits = {name: 1 << position for position, name in enumerate(names)}
+    masks = np.array([sum(bits.get(name, 0) for name in row) for row in lists], dtype=np.uint32)
+    return masks, names
+
+
+class CardTable:
+    """Compact column arrays over the catalog that search works on by row id.
+
+    Repeated strings (names, numbers, sets, rarity, supertype) are stored
+    once and referenced by int32 codes, and the set fields used for ranking
+    are parsed once per set instead of once per card.
+    """
+    # What a table is made of, as saved and memory-mapped by shared_catalog
+    ARRAY_FIELDS = ['name_codes', 'number_codes', 'rarity_codes', 'supertype_codes', 'type_masks', 'set_codes',
+                    'printed_totals', 'set_dates', 'set_name_ranks', 'id_order']
+    ROW_STRING_FIELDS = ['ids', 'images', 'tcgplayer']
+    LOOKUP_FIELDS = ['names', 'numbers', 'rarities', 'supertypes', 'type_names', 'set_reprs', 'set_names', 'set_series',
+                     'set_release_dates']
+
+    def __init__(self, df):
+        self.ids = df['id'].to_numpy(dtype=object)
+        self.images = df['images'].to_numpy(dtype=object)
+        self.tcgplayer = df['tcgplayer'].to_numpy(dtype=object)
+        self.printed_totals = df['printedTotal'].to_numpy(dtype=np.int32)
+        self.id_order = np.argsort(self.ids, kind='stable').astype(np.int32)
+
+        self.name_codes, self.names = factorize(df['name'])
+        self.number_codes, self.numbers = factorize(df['number'].astype(str))
+        self.rarity_codes, self.rarities = factorize(df['rarity'] if 'rarity' in df.columns else pd.Series([None] * len(df)))
+        self.supertype_codes, self.supertypes = factorize(df['supertype'] if 'supertype' in df.columns else pd.Series([None] * len(df)))
+        self.type_masks, self.type_names = type_masks(df['types'] if 'types' in df.columns else pd.Series([None] * len(df)))
+
+        # One entry per distinct Set(...) repr
+        self.set_codes, self.set_reprs = factorize(df['set'])
+        sets = pd.Series(self.set_reprs, dtype=object)
+        self.set_names = [sys.intern(name) for name in sets.str.extract(SET_NAME_PATTERN)[1].fillna("Unknown Set")]
+        self.set_series = [sys.intern(series) for series in sets.str.extract(SERIES_PATTERN)[0].fillna("Unknown Series")]
+        release_dates = sets.str.extract(RELEASE_DATE_PATTERN)[0]
+        self.set_release_dates = release_dates.fillna("Unknown Date").tolist()
+        # Sortable yyyymmdd dates, 2000-01-01 when the set has none
+        self.set_dates = release_dates.fillna("2000/01/01").str.replace("/", "").astype(np.int64).to_numpy()
+        # Position of each set name in sorted order, for ordering by set name with numpy
+        self.set_name_ranks = np.unique(np.array(self.set_names, dtype=object), return_inverse=True)[1].astype(np.int32)
+        self.index()
+
+    @classmethod
+    def from_fields(cls, fields):
+        """Builds a table from saved fields (see ARRAY_FIELDS, ROW_STRING_FIELDS and LOOKUP_FIELDS)."""
+        table = cls.__new__(cls)
+        for name, value in fields.items():
+            setattr(table, name, value)
+        table.index()
+        return table
+
+    def index(self):
+        # Lookups derived from the lookup tables; cheap, so they are never saved
+        self.size = len(self.name_codes)
+        self.name_index = {name: code for code, name in enumerate(self.names)}
+        self.lower_names = [name.lower() for name in self.names]
+        self.number_index = {number: code for code, number in enumerate(self.numbers)}
+
+    def __len__(self):
+        return self.size
+
+    def name_rows(self, name_codes):
+        """Row ids of the cards with any of these name codes, in catalog order."""
+        wanted = np.zeros(len(self.names), dtype=bool)
+        wanted[list(name_codes)] = True
+        return np.flatnonzero(wanted[self.name_codes])
+
+    def number_mask(self, number):
+        code = self.number_index.get(number)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.number_codes == code
+
+    def row_of(self, card_id):
+        """Row id of the card with this ID, or None; a binary search over the ids in sorted order."""
+        position = bisect.bisect_left(range(self.size), card_id, key=lambda i: self.ids[self.id_order[i]])
+        if position < self.size and self.ids[self.id_order[position]] == card_id:
+            return int(self.id_order[position])
+        return None
+
+    def card(self, row):
+        """The fields of one row that results and records are built from."""
+        return {'id': self.ids[row], 'name': self.names[self.name_codes[row]], 'set': self.set_reprs[self.set_codes[row]],
+                'images': self.images[row], 'tcgplayer': self.tcgplayer[row]}
+
+    def frame(self):
+        """The hot catalog columns as a DataFrame, for code that needs one."""
+        def lookup(values, codes):
+            return np.array(values, dtype=object)[codes]
+        return pd.DataFrame({
+            'id': list(self.ids), 'name': lookup(self.names, self.name_codes), 'number': lookup(self.numbers, self.number_codes),
+            'rarity': lookup(self.rarities, self.rarity_codes), 'supertype': lookup(self.supertypes, self.supertype_codes),
+            'set': lookup(self.set_reprs, self.set_codes), 'images': list(self.images), 'tcgplayer': list(self.tcgplayer),
+            'types': [str([name for bit, name in enumerate(self.type_names) if mask >> bit & 1]) if mask else None
+                      for mask in self.type_masks],
+            'printedTotal': np.asarray(self.printed_totals),
+        })
+
+    def nbytes(self):
+        """Approximate memory held by the code and row arrays (the shared string objects not included)."""
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS + self.ROW_STRING_FIELDS)
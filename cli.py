@@ -0,0 +1,216 @@
+"""Command-line entry point for searching, pricing and inventory work without the GUI.
+
+    python cli.py search "radiant charizard" --card-type Holofoil
+    python cli.py search charizard --series "Sword & Shield" --rarity "Rare Holo" --price-max 20
+    python cli.py search charizard --card-type Holofoil --sort market
+    python cli.py batch queries.txt > results.jsonl
+    python cli.py show swsh12pt5-20
+    python cli.py add swsh12pt5-20 --card-type Holofoil
+    python cli.py value
+    python cli.py deck decklist.txt
+    python cli.py refresh
+    python cli.py export collection.parquet --prices
+"""
+import argparse
+import json
+import logging
+import sys
+
+from catalog import Catalog, CATALOG_FILE, CARD_TYPES
+from search import SORT_KEYS
+from settings import read_ini_file, read_scoring_processes
+
+TABLE_COLUMNS = [('name', 'Name'), ('id', 'ID'), ('set_name', 'Series'), ('release_date', 'Release Date'),
+                 ('market', 'Market Price'), ('high', 'High Price'), ('mid', 'Mid Price'), ('low', 'Low Price')]
+
+
+def print_table(records):
+    widths = [max([len(title)] + [len(str(record[key])) for record in records]) for key, title in TABLE_COLUMNS]
+    print("  ".join(title.ljust(width) for (_, title), width in zip(TABLE_COLUMNS, widths)))
+    for record in records:
+        print("  ".join(str(record[key]).ljust(width) for (key, _), width in zip(TABLE_COLUMNS, widths)))
+
+def search_engine(args, catalog=None):
+    from search import CardSearchEngine
+    return CardSearchEngine(catalog or Catalog.load(args.catalog), args.processes)
+
+def facet_filter(args, catalog):
+    """Row mask for the search's facet options, or None when none are given."""
+    from facets import FACET_TITLES, FacetIndex, FacetSelection
+    index = FacetIndex(catalog)
+    selection = FacetSelection()
+    for facet in selection.values:
+        for label in getattr(args, facet) or []:
+            code = index.code_of(facet, label)
+            if code is None:
+                sys.exit(f"No card has {label!r} as its {FACET_TITLES[facet].lower()}. Known values: {', '.join(sorted(index.labels[facet]))}")
+            selection.values[facet].add(code)
+    selection.years = (args.year_from, args.year_to)
+    selection.prices = (args.price_min, args.price_max)
+    selection.finish = CARD_TYPES[args.card_type]
+    selection.in_finish = args.in_finish
+    return index.mask(selection)
+
+def run_search(args):
+    catalog = Catalog.load(args.catalog)
+    records = search_engine(args, catalog).search(args.query, args.card_type, args.page, args.page_size,
+                                                  row_filter=facet_filter(args, catalog), sort_by=args.sort,
+                                                  descending=not args.ascending)
+    if args.json:
+        print(json.dumps(records, indent=2))
+    elif records:
+        print_table(records)
+    else:
+        print("Card not found.")
+
+def run_batch(args):
+    engine = search_engine(args)
+    queries = open(args.queries, encoding='utf-8') if args.queries != '-' else sys.stdin
+    for line in queries:
+        query = line.strip()
+        if query:
+            records = engine.search(query, args.card_type, 0, args.limit)
+            print(json.dumps({'query': query, 'results': records}))
+
+def run_show(args):
+    from card_details import format_details
+    from search import card_record
+
+    catalog = Catalog.load(args.catalog)
+    card = search_engine(args, catalog).card(args.id)
+    if card is None:
+        sys.exit(f"Card {args.id} not found.")
+    print(format_details(card_record(card, args.card_type), catalog.details().details(args.id)))
+
+def run_add(args):
+    from inventory import add_card, inventory_row
+    from search import card_record
+
+    catalog = Catalog.load(args.catalog)
+    engine = search_engine(args, catalog)
+    row = engine.table.row_of(args.id)
+    if row is None:
+        sys.exit(f"Card {args.id} not found.")
+    card_details = inventory_row(card_record(engine.table.card(row), args.card_type))
+    if not catalog.finish_exists(row, CARD_TYPES[args.card_type]):
+        sys.exit(f"Card {args.card_type} does not exist.")
+
+    inventory_path = args.inventory or read_ini_file()
+    if add_card(inventory_path, card_details):
+        print('Card added to collection.')
+    else:
+        print('Card count increased in collection.')
+
+def run_value(args):
+    import pandas as pd
+    from valuation import value_collection
+    inventory = pd.read_excel(args.inventory or read_ini_file())
+    print(value_collection(inventory, Catalog.load(args.catalog), args.field).summary())
+
+def run_deck(args):
+    from deck import DeckResolver, parse_deck
+    from inventory import load_inventory, owned_counts
+
+    deck_list = open(args.deck, encoding='utf-8') if args.deck != '-' else sys.stdin
+    entries = parse_deck(deck_list.read())
+    owned = owned_counts(load_inventory(args.inventory or read_ini_file()))
+    print(DeckResolver(Catalog.load(args.catalog)).check(entries, owned).summary())
+
+def run_refresh(args):
+    from valuation import refresh_inventory_file
+    print(refresh_inventory_file(args.inventory or read_ini_file(), Catalog.load(args.catalog)).summary())
+
+
+def run_export(args):
+    from export import export_file, export_format
+    if not args.format:
+        try:
+            export_format(args.output)
+        except ValueError as e:
+            sys.exit(str(e))
+    catalog = Catalog.load(args.catalog) if args.prices else None
+    rows = export_file(args.inventory or read_ini_file(), args.output, catalog, args.format, args.chunk_rows)
+    print(f"Exported {rows} rows to {args.output}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CardLog without the GUI.")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help="catalog .xlsx file")
+    parser.add_argument('--verbose', action='store_true', help="log search steps to stderr")
+    parser.add_argument('--timings', action='store_true', help="print per-phase latencies to stderr when done")
+    parser.add_argument('--processes', type=int, default=read_scoring_processes(),
+                        help="processes for fuzzy name scoring (default: ScoringProcesses in config.ini, 0 for none)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="search the catalog by name or set number")
+    search.add_argument('query')
+    search.add_argument('--card-type', default='Normal', choices=list(CARD_TYPES))
+    search.add_argument('--page', type=int, default=0)
+    search.add_argument('--page-size', type=int, default=20)
+    search.add_argument('--json', action='store_true', help="print the records as JSON")
+    search.add_argument('--sort', default='relevance', choices=SORT_KEYS,
+                        help="order of the results; prices are those of --card-type (default: best match first)")
+    search.add_argument('--ascending', action='store_true', help="cheapest, oldest or A-Z first when sorting")
+    # Facet filters; a repeated option matches any of its values
+    search.add_argument('--set', action='append', help="only cards from this set")
+    search.add_argument('--series', action='append', help="only cards from this series")
+    search.add_argument('--rarity', action='append', help="only cards of this rarity")
+    search.add_argument('--supertype', action='append', help="only Pokémon, Trainer or Energy cards")
+    search.add_argument('--type', dest='types', action='append', help="only cards of this energy type")
+    search.add_argument('--year-from', type=int, help="only cards released in or after this year")
+    search.add_argument('--year-to', type=int, help="only cards released in or before this year")
+    search.add_argument('--price-min', type=float, help="only cards with a market price of at least this, in --card-type")
+    search.add_argument('--price-max', type=float, help="only cards with a market price of at most this, in --card-type")
+    search.add_argument('--in-finish', action='store_true', help="only cards that exist in --card-type (cards without any price data exist in every one)")
+    search.set_defaults(func=run_search)
+
+    batch = commands.add_parser('batch', help="run one search per line and print JSON Lines")
+    batch.add_argument('queries', nargs='?', default='-', help="file with one query per line (default: stdin)")
+    batch.add_argument('--card-type', default='Normal', choices=list(CARD_TYPES))
+    batch.add_argument('--limit', type=int, default=20, help="results per query")
+    batch.set_defaults(func=run_batch)
+
+    show = commands.add_parser('show', help="print a card's details: rarity, attacks, rules text")
+    show.add_argument('id')
+    show.add_argument('--card-type', default='Normal', choices=list(CARD_TYPES))
+    show.set_defaults(func=run_show)
+
+    add = commands.add_parser('add', help="add a card to the inventory by ID")
+    add.add_argument('id')
+    add.add_argument('--card-type', default='Normal', choices=list(CARD_TYPES))
+    add.add_argument('--inventory', help="inventory .xlsx file (default: the one in config.ini)")
+    add.set_defaults(func=run_add)
+
+    value = commands.add_parser('value', help="print the collection value at current catalog prices")
+    value.add_argument('--inventory', help="inventory .xlsx file (default: the one in config.ini)")
+    value.add_argument('--field', default='market', choices=['low', 'mid', 'high', 'market', 'directLow'])
+    value.set_defaults(func=run_value)
+
+    deck = commands.add_parser('deck', help="check a deck list against the inventory and price the missing cards")
+    deck.add_argument('deck', nargs='?', default='-', help="deck list in the standard text format (default: stdin)")
+    deck.add_argument('--inventory', help="inventory .xlsx file (default: the one in config.ini)")
+    deck.set_defaults(func=run_deck)
+
+    refresh = commands.add_parser('refresh', help="update the inventory's price columns from the catalog")
+    refresh.add_argument('--inventory', help="inventory .xlsx file (default: the one in config.ini)")
+    refresh.set_defaults(func=run_refresh)
+
+    export = commands.add_parser('export', help="write the inventory as CSV, Parquet or JSON Lines")
+    export.add_argument('output', help="file to write; the format follows its extension (.csv, .parquet, .jsonl)")
+    export.add_argument('--inventory', help="inventory .xlsx file (default: the one in config.ini)")
+    export.add_argument('--format', choices=['csv', 'parquet', 'jsonl'], help="format when the extension doesn't say")
+    export.add_argument('--prices', action='store_true', help="add each card's set, rarity and current catalog prices")
+    export.add_argument('--chunk-rows', type=int, default=10000, help="rows read and written at a time")
+    export.set_defaults(func=run_export)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    args.func(args)
+    if args.timings:
+        from timing import timings
+        print(timings.report(histograms=True), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Deck lists: parsing the standard text format and checking a deck against the collection.
+
+    Pokémon: 12
+    4 Charizard ex OBF 125
+    ...
+    Trainer: 36
+    4 Professor's Research SVI 189
+    Energy: 12
+    8 Basic {R} Energy SVE 2
+    Total Cards: 60
+
+Each line is resolved to a catalog printing by set code (the PTCGO code or
+the set id) and number, or by name when the line has no set. Ownership is
+read from an in-memory (ID, Card Type) -> Count map, so checking a deck is a
+few dictionary and array lookups per line.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from catalog import CARD_TYPES, FINISHES, price_column
+
+SECTION_PATTERN = re.compile(r"^(Pok[eé]mon|Trainer|Energy)\s*[:-]?\s*\d*\s*$", re.IGNORECASE)
+CARD_LINE_PATTERN = re.compile(r"^(?:\*\s*)?(\d+)x?\s+(.+?)(?:\s+([A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)?)\s+([A-Za-z]*\d+[A-Za-z]*))?\s*$")
+PTCGO_CODE_PATTERN = r"ptcgoCode='(.*?)'"
+SET_ID_PATTERN = r"^Set\(id='(.*?)'"
+# Energy symbols used by the online game's exports
+ENERGY_SYMBOLS = {'{G}': 'Grass', '{R}': 'Fire', '{W}': 'Water', '{L}': 'Lightning', '{P}': 'Psychic',
+                  '{F}': 'Fighting', '{D}': 'Darkness', '{M}': 'Metal', '{Y}': 'Fairy', '{C}': 'Colorless'}
+FINISH_CARD_TYPES = {finish: card_type for card_type, finish in CARD_TYPES.items()}
+
+
+class DeckEntry:
+    """One line of a deck list."""
+    def __init__(self, count, name, set_code=None, number=None, section=None):
+        self.count = count
+        self.name = name
+        self.set_code = set_code
+        self.number = number
+        self.section = section
+
+
+def parse_deck(text):
+    """Parses a deck list in the standard text format into DeckEntry objects; other lines are skipped."""
+    entries = []
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.lower().startswith('total cards'):
+            continue
+        match = SECTION_PATTERN.match(line)
+        if match:
+            section = 'Pokémon' if match.group(1).lower().startswith('pok') else match.group(1).capitalize()
+            continue
+        match = CARD_LINE_PATTERN.match(line)
+        if match:
+            count, name, set_code, number = match.groups()
+            entries.append(DeckEntry(int(count), name, set_code, number, section))
+    return entries
+
+def take_copies(owned, card_id, count):
+    """Takes up to `count` copies of a card, in any finish, out of an (ID, Card Type) -> Count map; returns how many."""
+    taken = 0
+    for card_type in CARD_TYPES:
+        available = max(owned.get((card_id, card_type), 0), 0)
+        if taken < count and available:
+            used = min(available, count - taken)
+            owned[(card_id, card_type)] = available - used
+            taken += used
+    return taken
+
+
+class DeckReport:
+    """What a deck needs from the collection and what the missing cards cost."""
+    def __init__(self, lines):
+        self.lines = lines
+        self.total_cards = sum(line['count'] for line in lines)
+        self.missing_cards = sum(line['missing'] for line in lines)
+        self.buy_cost = sum(line['missing'] * line['cheapest_price'] for line in lines
+                            if line['missing'] and line['cheapest_price'] is not None)
+        self.unresolved = [line for line in lines if line['id'] is None]
+        self.unpriced = [line for line in lines if line['missing'] and line['cheapest_price'] is None]
+
+    def summary(self):
+        lines = [f"{self.total_cards} cards, {self.total_cards - self.missing_cards} owned, {self.missing_cards} missing.",
+                 f"Cost of the missing cards at the cheapest printings: ${self.buy_cost:,.2f}"]
+        missing = [line for line in self.lines if line['missing']]
+        if missing:
+            lines += ["", "Missing:"]
+            for line in missing:
+                if line['cheapest_price'] is not None:
+                    cheapest = f"{line['cheapest_id']} {line['cheapest_card_type']} ${line['cheapest_price']:,.2f}"
+                else:
+                    cheapest = "no price"
+                lines.append(f"  {line['missing']} {line['name']} ({line['owned']} owned) - cheapest: {cheapest}")
+        if self.unresolved:
+            lines += ["", "Not in the catalog:"] + [f"  {line['count']} {line['text']}" for line in self.unresolved]
+        return "\n".join(lines)
+
+
+class DeckResolver:
+    """Resolves deck lines to catalog printings and prices the cheapest copy of each card."""
+    def __init__(self, catalog):
+        table = catalog.card_table()
+        self.table = table
+
+        # Set codes by PTCGO code and by set id, both case-insensitive
+        sets = pd.Series(table.set_reprs, dtype=object)
+        self.set_codes = {}
+        for pattern in (PTCGO_CODE_PATTERN, SET_ID_PATTERN):
+            for code, value in enumerate(sets.str.extract(pattern)[0]):
+                if isinstance(value, str) and value:
+                    self.set_codes.setdefault(value.lower(), []).append(code)
+
+        # Rows sorted by (set, number) so a printing is a binary search
+        self.key_scale = max(len(table.numbers), 1)
+        keys = table.set_codes.astype(np.int64) * self.key_scale + table.number_codes
+        self.key_order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.key_order]
+        # Rows sorted by name, so all printings of a name are one slice
+        self.name_order = np.argsort(table.name_codes, kind='stable')
+        self.sorted_names = table.name_codes[self.name_order]
+        self.lower_name_codes = {}
+        for code, name in enumerate(table.lower_names):
+            self.lower_name_codes.setdefault(name, code)
+
+        # Cheapest market price over the finishes of every card, and which finish it is
+        market = catalog.prices()[[price_column(finish, 'market') for finish in FINISHES]].to_numpy(dtype=float)
+        market = np.where(np.isnan(market), np.inf, market)
+        self.cheapest_finish = np.argmin(market, axis=1)
+        self.cheapest_price = market[np.arange(len(market)), self.cheapest_finish]
+        self.cheapest_price[np.isinf(self.cheapest_price)] = np.nan
+
+    def name_code(self, name):
+        code = self.table.name_index.get(name, self.lower_name_codes.get(name.lower()))
+        if code is not None:
+            return code
+        # "Basic {R} Energy" and "Basic Fire Energy" are called "Fire Energy" in the catalog
+        basic = re.match(r"^Basic\s+(\{\w\}|\w+)\s+Energy$", name, re.IGNORECASE)
+        if basic:
+            return self.name_code(f"{ENERGY_SYMBOLS.get(basic.group(1).upper(), basic.group(1))} Energy")
+        return None
+
+    def printing(self, entry):
+        """Row id of the printing a deck line names by set and number, or None.
+
+        If several cards share the set and number, the one with the line's name wins.
+        """
+        if not entry.set_code:
+            return None
+        table = self.table
+        found = None
+        for number in (entry.number, entry.number.lstrip('0')):
+            number_code = table.number_index.get(number)
+            if number_code is None:
+                continue
+            for set_code in self.set_codes.get(entry.set_code.lower(), []):
+                key = set_code * self.key_scale + number_code
+                start, end = np.searchsorted(self.sorted_keys, [key, key + 1])
+                for row in self.key_order[start:end]:
+                    if table.lower_names[table.name_codes[row]] == entry.name.lower():
+                        return int(row)
+                    if found is None:
+                        found = int(row)
+        return found
+
+    def printings(self, name_code):
+        """Row ids of every printing of a name, in catalog order."""
+        start, end = np.searchsorted(self.sorted_names, [name_code, name_code + 1])
+        return self.name_order[start:end]
+
+    def cheapest(self, rows):
+        """(card id, Card Type, price) of the cheapest priced printing among rows, or (None, None, None)."""
+        prices = self.cheapest_price[rows]
+        if np.isnan(prices).all():
+            return None, None, None
+        best = rows[int(np.nanargmin(prices))]
+        card_type = FINISH_CARD_TYPES[FINISHES[self.cheapest_finish[best]]]
+        return self.table.ids[best], card_type, float(self.cheapest_price[best])
+
+    def check(self, entries, owned):
+        """Returns a DeckReport for deck entries against an (ID, Card Type) -> Count map.
+
+        A line with a set and number uses copies of that printing in any
+        finish; a line with only a name uses copies of any printing of the
+        name. Each owned copy counts toward one line only, and lines naming a
+        printing take theirs before lines with only a name.
+        """
+        table = self.table
+        resolved = []
+        for entry in entries:
+            row = self.printing(entry)
+            exact = row is not None
+            name_code = table.name_codes[row] if exact else self.name_code(entry.name)
+            printings = self.printings(name_code) if name_code is not None else np.array([], dtype=np.int64)
+            if not exact and len(printings):
+                row = int(printings[0])
+            resolved.append((entry, row, exact, name_code, printings))
+
+        remaining = dict(owned)
+        have = [0] * len(resolved)
+        for exact_pass in (True, False):
+            for index, (entry, row, exact, name_code, printings) in enumerate(resolved):
+                if exact != exact_pass:
+                    continue
+                if exact:
+                    have[index] = take_copies(remaining, table.ids[row], entry.count)
+                else:
+                    for printing in printings:
+                        have[index] += take_copies(remaining, table.ids[printing], entry.count - have[index])
+
+        lines = []
+        for (entry, row, exact, name_code, printings), used in zip(resolved, have):
+            cheapest_id, cheapest_card_type, cheapest_price = self.cheapest(printings)
+            lines.append({
+                'count': entry.count, 'section': entry.section,
+                'text': " ".join(part for part in (entry.name, entry.set_code, entry.number) if part),
+                'name': table.names[name_code] if name_code is not None else entry.name,
+                'id': table.ids[row] if row is not None else None,
+                'owned': used, 'missing': entry.count - used,
+                'cheapest_id': cheapest_id, 'cheapest_card_type': cheapest_card_type, 'cheapest_price': cheapest_price,
+            })
+        return DeckReport(lines)
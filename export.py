@@ -0,0 +1,208 @@
+"""Streams a collection to CSV, Parquet or JSON Lines for other tools.
+
+    export_file('collection.xlsx', 'collection.parquet', Catalog.load())
+
+A collection file is read with openpyxl's read-only mode and written
+CHUNK_ROWS rows at a time, so memory is bounded by one chunk however big
+the collection is. With a catalog, each row also gets the card's current
+prices in its finish and its set metadata (see CatalogEnricher).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+from catalog import CARD_TYPES
+from inventory import INVENTORY_COLUMNS, normalize_inventory
+
+CHUNK_ROWS = 10000
+
+# File extensions of each format; the first one is the default
+EXPORT_FORMATS = {'csv': ['.csv'], 'parquet': ['.parquet', '.pq'], 'jsonl': ['.jsonl', '.ndjson']}
+
+# Inventory columns holding prices as text ('-' when there is none), exported as numbers
+PRICE_TEXT_COLUMNS = ['Market Price', 'High Price', 'Mid Price', 'Low Price']
+
+# Columns added from the catalog, after the inventory's own
+CATALOG_PRICE_COLUMNS = {'low': 'Current Low', 'mid': 'Current Mid', 'high': 'Current High', 'market': 'Current Market',
+                         'directLow': 'Current Direct Low'}
+CATALOG_COLUMNS = ['Set', 'Set Series', 'Set Release Date', 'Rarity', 'Supertype'] + list(CATALOG_PRICE_COLUMNS.values()) + ['Current Value']
+
+
+def export_format(path):
+    """The format for a file name's extension; raises ValueError for an unknown one."""
+    extension = os.path.splitext(path)[1].lower()
+    for name, extensions in EXPORT_FORMATS.items():
+        if extension in extensions:
+            return name
+    raise ValueError(f"Can't tell the export format of {path}; use one of "
+                     f"{', '.join(extension for extensions in EXPORT_FORMATS.values() for extension in extensions)}.")
+
+
+def file_chunks(inventory_path, chunk_rows=CHUNK_ROWS):
+    """Normalized inventory chunks read from an xlsx one batch of rows at a time."""
+    workbook = load_workbook(inventory_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield normalize_inventory(pd.DataFrame(batch, columns=header))
+                batch = []
+        if batch:
+            yield normalize_inventory(pd.DataFrame(batch, columns=header))
+    finally:
+        workbook.close()
+
+def frame_chunks(inventory, chunk_rows=CHUNK_ROWS):
+    """Normalized chunks of an inventory already in memory, e.g. an open collection's rows."""
+    for start in range(0, len(inventory), chunk_rows):
+        yield normalize_inventory(inventory.iloc[start:start + chunk_rows])
+
+
+def typed_chunk(chunk):
+    """A chunk with one dtype per column, so every chunk of a file has the same schema."""
+    typed = pd.DataFrame({column: chunk[column].map(lambda value: None if pd.isna(value) else str(value)).astype(object)
+                          for column in INVENTORY_COLUMNS})
+    for column in PRICE_TEXT_COLUMNS:
+        typed[column] = pd.to_numeric(chunk[column], errors='coerce').astype(float)
+    typed['Count'] = pd.to_numeric(chunk['Count'], errors='coerce').fillna(0).astype(np.int64)
+    return typed
+
+
+class CatalogEnricher:
+    """Adds CATALOG_COLUMNS to chunks: the card's set metadata and its current prices in the row's finish.
+
+    The catalog is looked up by row id through the CardTable's arrays, so
+    a chunk costs one id lookup per row and one array gather per column.
+    """
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.table = catalog.card_table()
+        ids = pd.Series(np.asarray(self.table.ids, dtype=object))
+        # First row of each id, as row_of() would find
+        self.rows = pd.Series(np.arange(len(ids)), index=ids)
+        self.rows = self.rows[~self.rows.index.duplicated()]
+
+    def enrich(self, chunk):
+        table = self.table
+        rows = chunk['ID'].astype(str).map(self.rows)
+        found = rows.notna().to_numpy()
+        rows = rows.fillna(0).astype(np.int64).to_numpy()
+        set_codes = np.asarray(table.set_codes)[rows]
+
+        def lookup(values, codes):
+            return np.where(found, np.array(values, dtype=object)[codes], None)
+        chunk['Set'] = lookup(table.set_names, set_codes)
+        chunk['Set Series'] = lookup(table.set_series, set_codes)
+        chunk['Set Release Date'] = lookup(table.set_release_dates, set_codes)
+        chunk['Rarity'] = lookup(table.rarities, np.asarray(table.rarity_codes)[rows])
+        chunk['Supertype'] = lookup(table.supertypes, np.asarray(table.supertype_codes)[rows])
+
+        finishes = chunk['Card Type'].map(CARD_TYPES).to_numpy()
+        for field, column in CATALOG_PRICE_COLUMNS.items():
+            values = np.full(len(chunk), np.nan)
+            for finish in pd.unique(finishes[found]):
+                if isinstance(finish, str):
+                    selected = found & (finishes == finish)
+                    values[selected] = self.catalog.price_values(finish, field)[rows[selected]]
+            chunk[column] = values
+        chunk['Current Value'] = chunk[CATALOG_PRICE_COLUMNS['market']] * chunk['Count']
+        return chunk
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+class JsonLinesWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, chunk):
+        if len(chunk):
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            self.file.write(text if text.endswith('\n') else text + '\n')
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None  # Opened with the first chunk's schema
+
+    @staticmethod
+    def schema(chunk):
+        # Spelled out rather than inferred, since a chunk whose text column is all empty would infer a null type
+        return pa.schema([(column, pa.string() if dtype == object else pa.from_numpy_dtype(dtype))
+                          for column, dtype in chunk.dtypes.items()])
+
+    def write(self, chunk):
+        table = pa.Table.from_pandas(chunk, schema=self.schema(chunk), preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression='zstd')
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter, 'jsonl': JsonLinesWriter}
+
+
+def export_chunks(chunks, output_path, catalog=None, export_as=None):
+    """Writes inventory chunks to `output_path` and returns the number of rows written.
+
+    The format is `export_as` ('csv', 'parquet' or 'jsonl') or else the
+    extension's. The file is written next to its destination and moved into
+    place when complete, so a failed export doesn't leave half a file.
+    """
+    export_as = export_as or export_format(output_path)
+    enricher = CatalogEnricher(catalog) if catalog is not None else None
+    building = f"{output_path}.tmp{os.getpid()}"
+    rows = 0
+    try:
+        writer = WRITERS[export_as](building)
+        try:
+            for chunk in chunks:
+                chunk = typed_chunk(chunk)
+                if enricher is not None:
+                    chunk = enricher.enrich(chunk)
+                writer.write(chunk)
+                rows += len(chunk)
+            if not rows:
+                # Still a header or schema, so an empty collection exports to a file other tools can open
+                chunk = typed_chunk(pd.DataFrame(columns=INVENTORY_COLUMNS))
+                writer.write(enricher.enrich(chunk) if enricher is not None else chunk)
+        finally:
+            writer.close()
+        os.replace(building, output_path)
+    except BaseException:
+        if os.path.exists(building):
+            os.remove(building)
+        raise
+    return rows
+
+def export_file(inventory_path, output_path, catalog=None, export_as=None, chunk_rows=CHUNK_ROWS):
+    """Streams a collection file to `output_path`; see export_chunks()."""
+    return export_chunks(file_chunks(inventory_path, chunk_rows), output_path, catalog, export_as)
+
+def export_inventory(inventory, output_path, catalog=None, export_as=None, chunk_rows=CHUNK_ROWS):
+    """Exports an inventory DataFrame already in memory; see export_chunks()."""
+    return export_chunks(frame_chunks(inventory, chunk_rows), output_path, catalog, export_as)
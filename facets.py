@@ -0,0 +1,117 @@
+"""Faceted filtering over the card table: set, series, rarity, supertype, types, release year, price and finish.
+
+Every facet value has a precomputed row-id list (its posting list), so a
+selection is a union of postings and a combination of facets is an
+intersection of boolean row masks. Facet counts are the usual "what would I
+get if I also picked this" numbers: each facet is counted against the rows
+matching every *other* active filter.
+"""
+import numpy as np
+import pandas as pd
+
+# Facets with one value per card, and the one with several (a card can have two types)
+SINGLE_FACETS = ['set', 'series', 'rarity', 'supertype']
+FACETS = SINGLE_FACETS + ['types']
+FACET_TITLES = {'set': 'Set', 'series': 'Series', 'rarity': 'Rarity', 'supertype': 'Supertype', 'types': 'Type'}
+
+
+class FacetSelection:
+    """Selected facet values (as value codes), a release-year range, and a price range and existence check for one finish."""
+    def __init__(self):
+        self.values = {facet: set() for facet in FACETS}
+        self.years = (None, None)
+        self.prices = (None, None)
+        self.finish = 'normal'
+        self.price_field = 'market'
+        self.in_finish = False  # Only cards that exist in the finish (see Catalog.finish_exists_mask)
+
+
+class FacetIndex:
+    """Posting lists and per-row facet codes for a catalog."""
+    def __init__(self, catalog):
+        self.catalog = catalog
+        table = catalog.card_table()
+        self.size = len(table)
+
+        # Sets and series are facets by name, so every printing of "Base Set" is one value
+        set_codes, set_names = pd.factorize(pd.Series(table.set_names, dtype=object))
+        series_codes, series_names = pd.factorize(pd.Series(table.set_series, dtype=object))
+        self.labels = {
+            'set': [str(name) for name in set_names],
+            'series': [str(name) for name in series_names],
+            'rarity': [str(value) if isinstance(value, str) else "Unknown" for value in table.rarities],
+            'supertype': [str(value) if isinstance(value, str) else "Unknown" for value in table.supertypes],
+            'types': list(table.type_names),
+        }
+        self.codes = {
+            'set': set_codes.astype(np.int32)[table.set_codes],
+            'series': series_codes.astype(np.int32)[table.set_codes],
+            'rarity': np.asarray(table.rarity_codes),
+            'supertype': np.asarray(table.supertype_codes),
+        }
+        self.postings = {facet: self.split(self.codes[facet], len(self.labels[facet])) for facet in SINGLE_FACETS}
+        masks = np.asarray(table.type_masks)
+        self.postings['types'] = [np.flatnonzero(masks & (1 << bit)) for bit in range(len(table.type_names))]
+        self.years = (np.asarray(table.set_dates) // 10000)[table.set_codes].astype(np.int16)
+
+    @staticmethod
+    def split(codes, count):
+        """Row ids grouped by code: one ascending row-id array per value."""
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(count + 1))
+        return [order[bounds[code]:bounds[code + 1]] for code in range(count)]
+
+    def year_range(self):
+        return int(self.years.min()), int(self.years.max())
+
+    def facet_mask(self, facet, codes):
+        """Rows having any of the value codes of one facet."""
+        mask = np.zeros(self.size, dtype=bool)
+        for code in codes:
+            mask[self.postings[facet][code]] = True
+        return mask
+
+    def masks(self, selection):
+        """{filter name: row mask} for every active filter of a selection."""
+        masks = {facet: self.facet_mask(facet, codes) for facet, codes in selection.values.items() if codes}
+        low, high = selection.years
+        if low is not None or high is not None:
+            masks['years'] = (self.years >= (low if low is not None else -1)) & (self.years <= (high if high is not None else 9999))
+        low, high = selection.prices
+        if low is not None or high is not None:
+            prices = self.catalog.price_values(selection.finish, selection.price_field)
+            with np.errstate(invalid='ignore'):
+                masks['prices'] = (prices >= (low if low is not None else -np.inf)) & (prices <= (high if high is not None else np.inf))
+        if selection.in_finish:
+            masks['finish'] = self.catalog.finish_exists_mask(selection.finish)
+        return masks
+
+    @staticmethod
+    def combine(masks, size, skip=None):
+        combined = np.ones(size, dtype=bool)
+        for name, mask in masks.items():
+            if name != skip:
+                combined &= mask
+        return combined
+
+    def mask(self, selection):
+        """Row mask of the cards matching every active filter, or None when nothing is filtered."""
+        masks = self.masks(selection)
+        return self.combine(masks, self.size) if masks else None
+
+    def counts(self, selection):
+        """{facet: count per value}, each facet counted under all the other active filters."""
+        masks = self.masks(selection)
+        counts = {}
+        for facet in FACETS:
+            others = self.combine(masks, self.size, skip=facet)
+            if facet in SINGLE_FACETS:
+                counts[facet] = np.bincount(self.codes[facet][others], minlength=len(self.labels[facet]))
+            else:
+                counts[facet] = np.array([np.count_nonzero(others[rows]) for rows in self.postings[facet]], dtype=np.int64)
+        return counts
+
+    def code_of(self, facet, label):
+        """Code of the facet value with this label, case-insensitively, or None."""
+        label = label.lower()
+        return next((code for code, value in enumerate(self.labels[facet]) if value.lower() == label), None)
@@ -0,0 +1,178 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_ENDPOINT = "https://api.pokemontcg.io/v2"
+PAGE_SIZE = 250
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Raised when a page could not be fetched after all retries."""
+
+
+class RateLimiter:
+    """Spaces requests out across all worker threads.
+
+    Allows at most `rate` requests per second and can be paused globally when
+    the server answers 429 with a Retry-After header.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+class CatalogFetcher:
+    """Downloads the card catalog by requesting pages concurrently.
+
+    Pages are requested through a bounded thread pool sharing one pooled
+    HTTP session. Failed requests are retried with exponential backoff and
+    the server's rate limits are respected. Pages are always yielded in page
+    order, so the result is identical to a sequential `Card.all()`.
+    """
+    def __init__(self, api_key=None, base_url=API_ENDPOINT, resource="cards", page_size=PAGE_SIZE,
+                 max_workers=8, max_retries=5, backoff=0.5, max_backoff=30.0, requests_per_second=10,
+                 timeout=30, progress=None):
+        self.url = f"{base_url.rstrip('/')}/{resource}"
+        self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.progress = progress or self.log_progress
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "Mozilla/5.0"
+        api_key = api_key if api_key is not None else os.getenv("POKEMONTCG_IO_API_KEY")
+        if api_key:
+            self.session.headers["X-Api-Key"] = api_key
+
+        self.total_pages = None
+        self.pages_done = 0
+        self.cards_done = 0
+        self.started_at = None
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def log_progress(pages_done, total_pages, cards_done, elapsed):
+        rate = cards_done / elapsed if elapsed > 0 else 0.0
+        logging.info(f"Fetched page {pages_done}/{total_pages or '?'} - {cards_done} cards, {rate:.0f} cards/s")
+
+    def retry_delay(self, attempt, response=None):
+        # Honour the server's Retry-After if it sent one, otherwise back off exponentially with jitter
+        if response is not None and response.headers.get("Retry-After"):
+            try:
+                return float(response.headers["Retry-After"])
+            except ValueError:
+                pass
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay + random.uniform(0, delay * 0.1)
+
+    def fetch_page(self, page):
+        """Fetches one page and returns the decoded JSON response."""
+        params = {"page": page, "pageSize": self.page_size}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            response = None
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+
+            if attempt == self.max_retries:
+                break
+            delay = self.retry_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                self.rate_limiter.pause(delay)
+            logging.warning(f"Page {page} failed ({error}), retrying in {delay:.1f}s.")
+            time.sleep(delay)
+
+        raise FetchError(f"Page {page} failed after {self.max_retries + 1} attempts: {error}")
+
+    def record_page(self, items):
+        self.pages_done += 1
+        self.cards_done += len(items)
+        self.progress(self.pages_done, self.total_pages, self.cards_done, time.monotonic() - self.started_at)
+
+    def iter_pages(self):
+        """Yields (page number, list of card dicts) in page order."""
+        self.pages_done = 0
+        self.cards_done = 0
+        self.started_at = time.monotonic()
+
+        first = self.fetch_page(1)
+        items = first.get("data", [])
+        if "totalCount" not in first:
+            # Without a total we can't fan out, so walk the pages until one comes back empty
+            page = 1
+            while items:
+                self.record_page(items)
+                yield page, items
+                page += 1
+                items = self.fetch_page(page).get("data", [])
+            return
+
+        self.total_pages = max(1, ceil(first["totalCount"] / self.page_size))
+        self.record_page(items)
+        yield 1, items
+
+        # Keep a bounded window of pages in flight so memory doesn't grow with the catalog
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            next_page = 2
+            for page in range(2, self.total_pages + 1):
+                while next_page <= self.total_pages and len(pending) < window:
+                    pending[next_page] = executor.submit(self.fetch_page, next_page)
+                    next_page += 1
+                items = pending.pop(page).result().get("data", [])
+                self.record_page(items)
+                yield page, items
+
+        elapsed = time.monotonic() - self.started_at
+        logging.info(f"Fetched {self.cards_done} cards in {elapsed:.1f}s ({self.cards_done / max(elapsed, 1e-9):.0f} cards/s).")
+
+    def fetch_all(self):
+        """Returns every card dict in the catalog, in the same order as a sequential fetch."""
+        cards = []
+        for _, items in self.iter_pages():
+            cards.extend(items)
+        return cards
@@ -1,22 +1,23 @@
-import pokemontcgsdk
-from pokemontcgsdk import Card, RestClient
-import pandas as pd
+import logging
 
-# Configure the API key
-RestClient.configure('#')
+from fetcher import CatalogFetcher
+from ingest import ingest_catalog, CATALOG_COLUMNS
+from price_history import PriceHistoryWriter, HISTORY_DIR
 
-# Fetch all cards
-cards_data = []
-cards = Card.all()
+API_KEY = None  # A pokemontcg.io key; None uses the POKEMONTCG_IO_API_KEY environment variable, if set
+CATALOG_FILE = "pokemon_card_data2.xlsx"
 
-# Collecting card details
-for card in cards:
-    card_dict = card.__dict__
-    cards_data.append(card_dict)
+def sync_catalog(filename=CATALOG_FILE, history_dir=HISTORY_DIR, max_workers=8):
+    """Fetches the whole catalog concurrently and streams it page by page into `filename`.
 
-def save_to_excel(data, filename="pokemon_card_data2.xlsx"):
-    df = pd.DataFrame(data)
-    df.to_excel(filename, index=False)
+    The prices of every sync are also appended to the price history store.
+    """
+    with CatalogFetcher(api_key=API_KEY, max_workers=max_workers) as fetcher, \
+         PriceHistoryWriter(history_dir) as history:
+        return ingest_catalog(filename, fetcher.iter_pages(),
+                              on_chunk=lambda rows: history.add_rows(rows, CATALOG_COLUMNS))
 
 
-save_to_excel(cards_data)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sync_catalog()
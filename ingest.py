@@ -0,0 +1,100 @@
+"""Streams fetched catalog pages to disk without holding the whole catalog in memory."""
+import csv
+import logging
+from dataclasses import fields
+
+import xlsxwriter
+from dacite import from_dict
+from pokemontcgsdk import Card
+
+from catalog import FINISHES, PRICE_FIELDS, FLAT_COLUMNS, price_column
+
+# Same columns, in the same order, as pd.DataFrame([card.__dict__ for card in Card.all()])
+CARD_COLUMNS = [f.name for f in fields(Card)]
+CATALOG_COLUMNS = CARD_COLUMNS + FLAT_COLUMNS
+
+
+def cell_value(value):
+    # Nested SDK objects and lists are stored as their repr, exactly like DataFrame.to_excel does
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def flatten_card(card):
+    """Returns one catalog row (a list in CATALOG_COLUMNS order) for an SDK Card."""
+    row = [cell_value(getattr(card, column)) for column in CARD_COLUMNS]
+
+    card_set = card.set
+    row += [card_set.id, card_set.name, card_set.series, card_set.printedTotal, card_set.releaseDate]
+    row += [card.images.small, card.images.large] if card.images else [None, None]
+
+    tcgplayer = card.tcgplayer
+    row += [tcgplayer.url, tcgplayer.updatedAt] if tcgplayer else [None, None]
+    prices = tcgplayer.prices if tcgplayer else None
+    for finish in FINISHES:
+        price = getattr(prices, finish) if prices else None
+        row += [getattr(price, field) if price else None for field in PRICE_FIELDS]
+
+    return row
+
+def parse_page(items):
+    """Turns one page of raw API JSON into catalog rows."""
+    return [flatten_card(from_dict(Card, Card.transform(item))) for item in items]
+
+
+class XlsxCatalogWriter:
+    """Writes rows to an xlsx file in constant memory, flushing each row as it is written."""
+    def __init__(self, filename, columns):
+        self.workbook = xlsxwriter.Workbook(filename, {'constant_memory': True, 'strings_to_urls': False,
+                                                       'nan_inf_to_errors': True})
+        self.sheet = self.workbook.add_worksheet()
+        self.sheet.write_row(0, 0, columns)
+        self.next_row = 1
+
+    def append(self, rows):
+        for row in rows:
+            self.sheet.write_row(self.next_row, 0, row)
+            self.next_row += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+class CsvCatalogWriter:
+    def __init__(self, filename, columns):
+        self.file = open(filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def append(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+def open_catalog_writer(filename, columns=CATALOG_COLUMNS):
+    if filename.lower().endswith('.csv'):
+        return CsvCatalogWriter(filename, columns)
+    return XlsxCatalogWriter(filename, columns)
+
+def ingest_catalog(filename, pages, on_chunk=None):
+    """Writes every page from `pages` (an iterable of (page, items)) to `filename`.
+
+    Each page is parsed, flattened and appended as one chunk, so peak memory
+    is a single page no matter how large the catalog is. `on_chunk` is
+    called with each chunk of rows after it has been written.
+    """
+    writer = open_catalog_writer(filename)
+    total = 0
+    try:
+        for page, items in pages:
+            rows = parse_page(items)
+            writer.append(rows)
+            total += len(rows)
+            if on_chunk:
+                on_chunk(rows)
+    finally:
+        writer.close()
+    logging.info(f"Wrote {total} cards to {filename}.")
+    return total
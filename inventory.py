@@ -0,0 +1,271 @@
+"""Inventory file operations shared by the GUI and the command line."""
+import os
+import threading
+
+import pandas as pd
+
+from catalog import CARD_TYPES
+
+INVENTORY_COLUMNS = ['Name', 'ID', 'Series', 'Release Date', 'Market Price', 'High Price', 'Mid Price', 'Low Price', 'Card Type', 'Count']
+
+
+def inventory_row(record):
+    """Turns a search result record into an inventory row."""
+    return {
+        'Name': record['name'],
+        'ID': record['id'],
+        'Series': record['set_name'],
+        'Release Date': record['release_date'],
+        'Market Price': record['market'],
+        'High Price': record['high'],
+        'Mid Price': record['mid'],
+        'Low Price': record['low'],
+        'Card Type': record['card_type'],
+    }
+
+def load_inventory(inventory_path):
+    if os.path.exists(inventory_path):
+        return pd.read_excel(inventory_path)
+    return pd.DataFrame(columns=INVENTORY_COLUMNS)
+
+def owned_counts(inventory):
+    """Returns {(ID, Card Type): Count} for an inventory DataFrame."""
+    if inventory.empty or not {'ID', 'Card Type', 'Count'} <= set(inventory.columns):
+        return {}
+    counts = pd.to_numeric(inventory['Count'], errors='coerce').fillna(0).astype(int).tolist()
+    owned = {}
+    for key, count in zip(zip(inventory['ID'].astype(str).tolist(), inventory['Card Type'].tolist()), counts):
+        owned[key] = owned.get(key, 0) + count
+    return owned
+
+def owned_label(owned, card_id):
+    """Owned copies of a card per finish, e.g. '2 Normal, 1 Reverse Holofoil', from an owned_counts() map."""
+    counts = [(owned.get((card_id, card_type), 0), card_type) for card_type in CARD_TYPES]
+    return ", ".join(f"{count} {card_type}" for count, card_type in counts if count)
+
+def normalize_inventory(inventory):
+    """The inventory with exactly INVENTORY_COLUMNS, in order, and a 0..n-1 index; empty if it has no ID or Card Type.
+
+    Columns are object dtype, so edited cells can hold text or numbers like the file does.
+    """
+    if 'ID' not in inventory.columns or 'Card Type' not in inventory.columns:
+        return pd.DataFrame(columns=INVENTORY_COLUMNS)
+    return inventory.reindex(columns=INVENTORY_COLUMNS, fill_value="").reset_index(drop=True).astype(object)
+
+def add_card_row(inventory, card_details):
+    """Adds one card to an inventory DataFrame, or bumps its Count if the ID and Card Type are already there.
+
+    Returns the inventory, the position of the card's row, and True if a new
+    row was added, False if an existing count was increased.
+    """
+    card_df = pd.DataFrame([card_details])
+
+    # Handle case if 'ID' column and 'Card Type' doesn't exist in the inventory file
+    if 'ID' not in inventory.columns or 'Card Type' not in inventory.columns:
+        inventory = pd.DataFrame(columns=INVENTORY_COLUMNS)
+
+    # Check if the card already exists in the inventory with the specified card type
+    existing_card = inventory[(inventory['ID'] == card_details['ID']) & (inventory['Card Type'] == card_details['Card Type'])]
+    if not existing_card.empty:
+        # If card exists, increase the count
+        index = existing_card.index[0]
+        inventory.at[index, 'Count'] = int(inventory.at[index, 'Count']) + 1
+        return inventory, inventory.index.get_loc(index), False
+
+    card_df['Count'] = 1
+    inventory = card_df if inventory.empty else pd.concat([inventory, card_df], ignore_index=True)
+    return inventory, len(inventory) - 1, True
+
+def add_card(inventory_path, card_details):
+    """Adds one card to the inventory file, or bumps its Count if the ID and Card Type are already there.
+
+    Returns True if a new row was added and False if an existing count was increased.
+    """
+    inventory, _, added = add_card_row(load_inventory(inventory_path), card_details)
+    inventory.to_excel(inventory_path, index=False)
+    return added
+
+class InventoryDiff:
+    """How a newer version of an inventory differs from an older one, matching rows by (ID, Card Type).
+
+    `changed` pairs an old row position with the new row for it, `removed`
+    holds old positions and `added` new positions.
+    """
+    def __init__(self, changed, removed, added):
+        self.changed = changed
+        self.removed = removed
+        self.added = added
+
+    def __bool__(self):
+        return bool(self.changed or self.removed or self.added)
+
+    def __len__(self):
+        return len(self.changed) + len(self.removed) + len(self.added)
+
+def row_keys(inventory):
+    # (ID, Card Type, n) for the n-th row of the same card and type, so duplicate rows are matched in order
+    ids = inventory['ID'].astype(str)
+    card_types = inventory['Card Type'].astype(str)
+    occurrence = inventory.groupby([ids, card_types]).cumcount()
+    return list(zip(ids, card_types, occurrence))
+
+def diff_inventories(old, new):
+    """Returns the InventoryDiff from `old` to `new`, both normalized inventories."""
+    old_keys = {key: position for position, key in enumerate(row_keys(old))}
+    new_keys = {key: position for position, key in enumerate(row_keys(new))}
+    # Values are compared as text, since the same row can hold 5 or '5' depending on where it came from
+    old_text = old.astype(str).to_numpy()
+    new_text = new.astype(str).to_numpy()
+    changed = [(position, new_keys[key]) for key, position in old_keys.items()
+               if key in new_keys and (old_text[position] != new_text[new_keys[key]]).any()]
+    removed = [position for key, position in old_keys.items() if key not in new_keys]
+    added = [position for key, position in new_keys.items() if key not in old_keys]
+    return InventoryDiff(changed, removed, added)
+
+def file_stamp(path):
+    """(size, mtime) of a file, or None if there is no file."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Collection:
+    """An inventory file held in memory, as it was on disk at `stamp`.
+
+    The row edits below change the rows in memory and mark the collection
+    dirty; save() writes them.
+    """
+    def __init__(self, path, inventory, stamp):
+        self.path = path
+        self.inventory = normalize_inventory(inventory)
+        self.stamp = stamp
+        self.dirty = False
+        self._owned = None
+
+    @property
+    def name(self):
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    def owned(self):
+        """{(ID, Card Type): Count}, kept up to date by the row edits."""
+        if self._owned is None:
+            self._owned = owned_counts(self.inventory)
+        return self._owned
+
+    def count_owned(self, row, sign):
+        # Adds (sign 1) or takes away (sign -1) a row's copies in the owned counts
+        if self._owned is not None:
+            key = (str(self.inventory.at[row, 'ID']), self.inventory.at[row, 'Card Type'])
+            try:
+                count = int(float(self.inventory.at[row, 'Count']))
+            except (TypeError, ValueError):
+                count = 0  # As owned_counts() counts it
+            self._owned[key] = self._owned.get(key, 0) + sign * count
+
+    def save(self):
+        self.inventory.to_excel(self.path, index=False)
+        self.stamp = file_stamp(self.path)
+        self.dirty = False
+
+    def add_card(self, card_details):
+        """add_card() on the rows in memory; returns the card's row and whether it is a new row."""
+        self.inventory, row, added = add_card_row(self.inventory, card_details)
+        if self._owned is not None:
+            key = (str(card_details['ID']), card_details['Card Type'])
+            self._owned[key] = self._owned.get(key, 0) + 1
+        self.dirty = True
+        return row, added
+
+    def set_count(self, row, count):
+        self.count_owned(row, -1)
+        self.inventory.at[row, 'Count'] = count
+        self.count_owned(row, 1)
+        self.dirty = True
+
+    def update_row(self, row, data):
+        """Sets every column of a row from a dict or Series."""
+        self.count_owned(row, -1)
+        for column in INVENTORY_COLUMNS:
+            self.inventory.at[row, column] = data[column]
+        self.count_owned(row, 1)
+        self.dirty = True
+
+    def remove_row(self, row):
+        """Removes a row and returns it as a dict."""
+        self.count_owned(row, -1)
+        data = self.inventory.iloc[row].to_dict()
+        self.inventory = self.inventory.drop(index=row).reset_index(drop=True)
+        self.dirty = True
+        return data
+
+    def append_row(self, data):
+        """Adds a row (one returned by remove_row) at the end and returns its position."""
+        row = pd.DataFrame([data]).reindex(columns=INVENTORY_COLUMNS, fill_value="")
+        self.inventory = row if self.inventory.empty else pd.concat([self.inventory, row], ignore_index=True)
+        self.count_owned(len(self.inventory) - 1, 1)
+        self.dirty = True
+        return len(self.inventory) - 1
+
+    def changes_on_disk(self):
+        """(rows in the file, its stamp, InventoryDiff from the rows held), or None if the file is as last read or written or gone."""
+        stamp = file_stamp(self.path)
+        if stamp is None or stamp == self.stamp:
+            return None  # A missing file is usually mid-replace by a sync client; the next save writes it again
+        inventory = normalize_inventory(load_inventory(self.path))
+        return inventory, stamp, diff_inventories(self.inventory, inventory)
+
+    def synced(self, stamp):
+        """Marks the rows held as matching the file at `stamp`."""
+        self.stamp = stamp
+        self.dirty = False
+
+    def replace(self, inventory):
+        """Swaps in new rows for the same cards, e.g. repriced ones."""
+        self.inventory = normalize_inventory(inventory)
+        self._owned = None
+        self.dirty = True
+
+
+class CollectionManager:
+    """The collections open at once, cached by path.
+
+    A collection is read from its file the first time it is opened and again
+    only when the file's size or mtime no longer match what was read, so
+    switching between open collections doesn't touch the disk.
+    """
+    def __init__(self):
+        self.collections = {}
+        self.active_path = None
+        self.lock = threading.Lock()  # The first collection is opened on the catalog loader's thread
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def open(self, path):
+        with self.lock:
+            key = self.key(path)
+            stamp = file_stamp(path)
+            collection = self.collections.get(key)
+            # A collection with unsaved edits is kept even if its file changed; saving it decides which version wins
+            if collection is None or (collection.stamp != stamp and not collection.dirty):
+                collection = Collection(path, load_inventory(path), stamp)
+                self.collections[key] = collection
+            return collection
+
+    def activate(self, path):
+        """Makes `path` the collection that cards are added to, and returns it."""
+        self.active_path = path
+        return self.open(path)
+
+    def active(self):
+        return self.open(self.active_path) if self.active_path else None
+
+    def close(self, path):
+        with self.lock:
+            self.collections.pop(self.key(path), None)
+
+    def paths(self):
+        return [collection.path for collection in self.collections.values()]
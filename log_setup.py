@@ -0,0 +1,44 @@
+"""Non-blocking logging: records are queued and written to a size-rotated file on a listener thread."""
+import atexit
+import logging
+import logging.handlers
+import queue
+
+LOG_FILE = 'app.log'
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+listener = None
+
+
+def setup_logging(level='INFO', filename=LOG_FILE):
+    """Routes the root logger through a QueueHandler so callers never wait on file I/O."""
+    global listener
+    if listener is not None:
+        return listener
+
+    file_handler = logging.handlers.RotatingFileHandler(filename, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    level = logging.getLevelName(str(level).upper())
+    root.setLevel(level if isinstance(level, int) else logging.INFO)
+
+    # urllib3 logs every connection at DEBUG; keep it out unless we are debugging
+    if root.level > logging.DEBUG:
+        logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_logging)
+    return listener
+
+def stop_logging():
+    """Flushes the queue and stops the listener thread."""
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
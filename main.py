@@ -1,47 +1,227 @@
-import pandas as pd
+import time
+START_TIME = time.perf_counter()
+
 import re
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTextEdit, QLabel, 
                             QScrollArea, QComboBox, QButtonGroup, QRadioButton, QGraphicsOpacityEffect, QDockWidget, QMainWindow,
-                            QSpinBox, QFileDialog, QMessageBox, QInputDialog)
-from PyQt5.QtGui import QTextCursor, QPixmap, QPalette, QIcon
-from PyQt5.QtCore import Qt, QTimer
+                            QSpinBox, QFileDialog, QMessageBox, QInputDialog, QDialog, QShortcut, QCheckBox,
+                            QListWidget, QListWidgetItem, QDoubleSpinBox, QFormLayout)
+from PyQt5.QtGui import QTextCursor, QPixmap, QPalette, QIcon, QKeySequence, QFont
+from PyQt5.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal, QFileSystemWatcher
 from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
-import requests
-import configparser
 import os
 from math import ceil
-from difflib import get_close_matches, SequenceMatcher
 from ast import literal_eval
 import logging
+from settings import read_ini_file, write_ini_file, read_log_level, read_scoring_processes
+from log_setup import setup_logging, stop_logging
+from timing import span, timings
 
-# Setting up logging
-logging.basicConfig(filename='app.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# pandas, requests and the catalog/search/inventory/valuation modules are imported where they are used,
+# so the window can be shown before the heavy modules are loaded
 
-def write_ini_file(inventory_filename):
-    config = configparser.ConfigParser()
-    config["DEFAULT"]["InventoryFile"] = inventory_filename
-    with open("config.ini", "w") as configfile:
-        config.write(configfile)
+# Result table columns that sort the search results when their header is clicked; Name goes back to best match first
+SORT_COLUMNS = {0: 'relevance', 2: 'set', 3: 'release_date', 4: 'market', 5: 'high', 6: 'mid', 7: 'low'}
 
-def read_ini_file():
-    """Reads the name of the inventory file from the .ini file."""
-    config = configparser.ConfigParser()
-    config.read("config.ini")
-    
-    return config["DEFAULT"]["InventoryFile"]
+class CatalogLoader(QThread):
+    """Loads the card catalog (and pandas with it), then opens the active collection, off the GUI thread."""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    collections_loaded = pyqtSignal(object)  # CollectionManager with the active collection open
 
-# Reading data from the Excel file
-file_path = "C:/Users/josep/Dropbox/Babcanec Works/Programming/pokemon/pokemon_card_data.xlsx"
-df = pd.read_excel(file_path)
+    def __init__(self, inventory_path, parent=None):
+        super().__init__(parent)
+        self.inventory_path = inventory_path
 
-INVENTORY_FILE = read_ini_file()
+    def run(self):
+        try:
+            from catalog import Catalog
+            self.loaded.emit(Catalog.load())
+        except Exception as e:
+            logging.exception('Failed to load the catalog.')
+            self.failed.emit(str(e))
+            return
+        from inventory import CollectionManager
+        collections = CollectionManager()
+        try:
+            collections.activate(self.inventory_path)
+        except Exception:
+            logging.exception('Failed to read the collection %s.', self.inventory_path)
+        self.collections_loaded.emit(collections)
+
+class SearchWorker(QObject):
+    """Runs search-as-you-type queries on a background thread.
+
+    Every submit supersedes the previous query: stale queries are skipped
+    before they start, stop between search phases, and never emit results.
+    """
+    finished = pyqtSignal(int, str, object, object)  # generation, query, records, first image bytes
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.generation = 0
+
+    def submit(self, engine, query, card_type, page_size, image_cache, **options):
+        # options are passed on to CardSearchEngine.search (row_filter, sort_by, descending)
+        self.generation += 1
+        self.executor.submit(self.run, self.generation, engine, query, card_type, page_size, image_cache, options)
+        return self.generation
+
+    def cancel(self):
+        self.generation += 1
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def run(self, generation, engine, query, card_type, page_size, image_cache, options):
+        from search import SearchCancelled
+        cancelled = lambda: generation != self.generation
+        if cancelled():
+            return
+        try:
+            records = engine.search(query, card_type, 0, page_size, cancelled=cancelled, **options)
+        except SearchCancelled:
+            return
+        except Exception:
+            logging.exception('Search as you type failed.')
+            return
 
-# Extracting the printedTotal value from the 'set' column using regex
-pattern = r'printedTotal=(\d+),'
-df['printedTotal'] = df['set'].str.extract(pattern)[0].astype(int)
+        # Download the first card's image here too, so typing never waits on the network
+        image_data = None
+        image_url = next((record['image_url'] for record in records if record['image_url']), None)
+        if image_url and image_url not in image_cache and not cancelled():
+            try:
+                import requests
+                with span('image fetch'):
+                    image_data = requests.get(image_url).content
+            except Exception:
+                logging.exception('Image prefetch failed.')
+
+        if not cancelled():
+            self.finished.emit(generation, query, records, image_data)
+
+class DetailLoader(QObject):
+    """Reads a card's cold catalog columns off the GUI thread; only the latest request is delivered."""
+    loaded = pyqtSignal(str, object)  # card id, details
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.current_id = None
+
+    def request(self, store, card_id):
+        self.current_id = card_id
+        self.executor.submit(self.run, store, card_id)
+
+    def prepare(self, store):
+        # Build the on-disk detail store in the background so the first selected card doesn't wait for it
+        self.executor.submit(lambda: store.is_current() or store.build())
+
+    def shutdown(self):
+        self.current_id = None
+        self.executor.shutdown(wait=False)
+
+    def run(self, store, card_id):
+        if card_id != self.current_id:
+            return
+        try:
+            with span('card details'):
+                details = store.details(card_id)
+        except Exception:
+            logging.exception('Loading the details of %s failed.', card_id)
+            details = None
+        if card_id == self.current_id:
+            self.loaded.emit(card_id, details)
+
+class InventoryModel(QObject):
+    """The active collection, shared by the main window and the collection window.
+
+    Every change to the collection goes through here: the rows change in
+    memory, the views are told which row changed, and the file is written a
+    moment later, so a burst of adds is a single write.
+    """
+    row_added = pyqtSignal(int)
+    row_changed = pyqtSignal(int)
+    row_removed = pyqtSignal(int)
+    reset = pyqtSignal()  # Another collection, or the same one read again
+    reloaded = pyqtSignal()  # Changes made to the file outside the app were applied
+    save_failed = pyqtSignal(str)
+
+    SAVE_DELAY_MS = 1000
+
+    def __init__(self, collection, parent=None):
+        super().__init__(parent)
+        self.collection = collection  # inventory.Collection
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.save)
+
+    def save(self):
+        self.save_timer.stop()
+        if self.collection.dirty:
+            try:
+                self.collection.save()
+            except Exception as e:
+                logging.exception('Failed to save the collection %s.', self.collection.path)
+                self.save_failed.emit(str(e))
+
+    def set_collection(self, collection):
+        # The edits to the previous collection are written first
+        self.save()
+        self.collection = collection
+        self.reset.emit()
+
+    def add_card(self, card_details):
+        row, added = self.collection.add_card(card_details)
+        (self.row_added if added else self.row_changed).emit(row)
+        self.save_timer.start()
+        return added
+
+    def set_count(self, row, count):
+        self.collection.set_count(row, count)
+        self.row_changed.emit(row)
+        self.save_timer.start()
+
+    def remove_row(self, row):
+        data = self.collection.remove_row(row)
+        self.row_removed.emit(row)
+        self.save_timer.start()
+        return data
+
+    def append_row(self, data):
+        self.row_added.emit(self.collection.append_row(data))
+        self.save_timer.start()
+
+    def apply_diff(self, inventory, stamp, diff):
+        """Applies the rows of the file at `stamp` that differ (see inventory.diff_inventories), one signal per row."""
+        collection = self.collection
+        self.save_timer.stop()
+        # Changes first, while the old row positions still hold; then removals from the bottom up, then new rows
+        for row, new_row in diff.changed:
+            collection.update_row(row, inventory.iloc[new_row])
+            self.row_changed.emit(row)
+        for row in sorted(diff.removed, reverse=True):
+            collection.remove_row(row)
+            self.row_removed.emit(row)
+        for new_row in diff.added:
+            self.row_added.emit(collection.append_row(inventory.iloc[new_row].to_dict()))
+        collection.synced(stamp)
+        self.reloaded.emit()
+
+    def replace(self, inventory, changed_rows):
+        """Swaps in new rows for the same cards (e.g. repriced ones), of which `changed_rows` differ."""
+        self.collection.replace(inventory)
+        for row in changed_rows:
+            self.row_changed.emit(row)
+        self.save_timer.start()
 
 class PokemonCardApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, inventory_path=None):
         super().__init__()
         self.setWindowIcon(QIcon("pokemon.ico"))
         self.image_urls = []
@@ -51,8 +231,36 @@ class PokemonCardApp(QMainWindow):
         self.image_cache = {}
         self.current_page = 0  # Pagination - current page
         self.page_size = 20  # Pagination - number of cards per page
+        self.catalog = None  # Set once the CatalogLoader finishes
+        self.search_engine = None
+        self.deck_resolver = None  # Built on the first deck check
+        self.inventory_path = inventory_path or read_ini_file()  # Active collection until the CollectionManager is loaded
+        self.collections = None  # CollectionManager, set by the CatalogLoader
+        self.inventory_model = None  # InventoryModel of the active collection
+        self.facet_index = None  # Built when the filter panel is first opened
+        self.row_filter = None  # Bool row mask of the active filters, or None
+        self.sort_by = 'relevance'  # One of search.SORT_KEYS, picked by clicking a column header
+        self.sort_descending = True
+        self.owned = {}  # (ID, Card Type) -> Count of the active collection, kept in step with every change to it
+        self.page_records = []  # Result records shown on the current page
+        self.detail_card_id = None  # Card shown in the detail pane
+        self.first_search_logged = False
         self.card_search = CardSearch(self)
+        self.search_worker = SearchWorker(self)
+        self.search_worker.finished.connect(self.on_live_search_finished)
+        self.detail_loader = DetailLoader(self)
+        self.detail_loader.loaded.connect(self.on_details_loaded)
+        # The active collection's file is watched for edits from other machines (it usually lives on Dropbox)
+        self.inventory_watcher = QFileSystemWatcher(self)
+        self.inventory_watcher.fileChanged.connect(self.on_inventory_file_changed)
+        self.inventory_reload = QTimer(self)
+        self.inventory_reload.setSingleShot(True)
+        self.inventory_reload.setInterval(500)  # A synced file can be written in several steps
+        self.inventory_reload.timeout.connect(self.check_inventory_file)
+        self.resolving_conflict = False
         self.init_ui()
+        self.set_catalog_ready(False)
+        self.set_collections_ready(False)
         
     def init_ui(self):
         # Create a central widget for the QMainWindow
@@ -74,6 +282,7 @@ class PokemonCardApp(QMainWindow):
         # Input field
         self.input_field = QLineEdit(self)
         self.input_field.returnPressed.connect(self.search_card)
+        self.input_field.textChanged.connect(self.on_search_text_changed)
         self.update_input_placeholder()
         search_hbox.addWidget(self.input_field)
 
@@ -85,6 +294,12 @@ class PokemonCardApp(QMainWindow):
 
         layout.addLayout(search_hbox)
 
+        # Search-as-you-type fires this after a short pause in typing
+        self.search_debounce = QTimer(self)
+        self.search_debounce.setSingleShot(True)
+        self.search_debounce.setInterval(250)
+        self.search_debounce.timeout.connect(self.start_live_search)
+
         # Create a dock widget for the controls
         dock = QDockWidget("Controls", self)
         dock.setAllowedAreas(Qt.LeftDockWidgetArea)
@@ -113,12 +328,49 @@ class PokemonCardApp(QMainWindow):
         self.change_inventory_button.clicked.connect(self.change_inventory)
         dock_layout.addWidget(self.change_inventory_button)
 
+        # Collections opened this session; switching between them doesn't read the files again
+        self.collection_combo = QComboBox(dock_widget)
+        self.collection_combo.setMaximumWidth(150)
+        self.collection_combo.activated.connect(self.on_collection_picked)
+        dock_layout.addWidget(self.collection_combo)
+
         # New Inventory button
         self.new_inventory_button = QPushButton('New Collection', dock_widget)
         self.new_inventory_button.setMaximumWidth(150)
         self.new_inventory_button.clicked.connect(self.create_new_inventory)
         dock_layout.addWidget(self.new_inventory_button)
 
+        # Collection value button
+        self.collection_value_button = QPushButton('Collection Value', dock_widget)
+        self.collection_value_button.setMaximumWidth(150)
+        self.collection_value_button.clicked.connect(self.show_collection_value)
+        dock_layout.addWidget(self.collection_value_button)
+
+        # Refresh prices button
+        self.refresh_prices_button = QPushButton('Refresh Prices', dock_widget)
+        self.refresh_prices_button.setMaximumWidth(150)
+        self.refresh_prices_button.clicked.connect(self.refresh_prices)
+        dock_layout.addWidget(self.refresh_prices_button)
+
+        self.export_button = QPushButton('Export Collection', dock_widget)
+        self.export_button.setMaximumWidth(150)
+        self.export_button.clicked.connect(self.export_collection)
+        dock_layout.addWidget(self.export_button)
+
+        self.check_deck_button = QPushButton('Check Deck', dock_widget)
+        self.check_deck_button.setMaximumWidth(150)
+        self.check_deck_button.clicked.connect(self.check_deck)
+        dock_layout.addWidget(self.check_deck_button)
+
+        self.filters_button = QPushButton('Filters', dock_widget)
+        self.filters_button.setMaximumWidth(150)
+        self.filters_button.clicked.connect(self.show_filters)
+        dock_layout.addWidget(self.filters_button)
+
+        # Search as you type toggle
+        self.live_search_checkbox = QCheckBox('Search as you type', dock_widget)
+        dock_layout.addWidget(self.live_search_checkbox)
+
         # Card type selection
         self.card_type_group = QButtonGroup(self)
         self.normal_button = QRadioButton('Normal', dock_widget)
@@ -137,7 +389,7 @@ class PokemonCardApp(QMainWindow):
         dock_layout.addWidget(self.first_ed_holofoil_button)
         dock_layout.addWidget(self.first_ed_normal_button)
         self.normal_button.setChecked(True)  # Default to normal
-        self.card_type_group.buttonClicked.connect(self.card_search.search_card)
+        self.card_type_group.buttonClicked.connect(self.on_card_type_changed)
 
         self.addDockWidget(Qt.LeftDockWidgetArea, dock)
 
@@ -149,10 +401,12 @@ class PokemonCardApp(QMainWindow):
 
         # Display table
         self.display_table = QTableWidget(self)
-        self.display_table.setColumnCount(8)
-        self.display_table.setHorizontalHeaderLabels(['Name', 'ID', 'Series', 'Release Date', 'Market Price', 'High Price', 'Mid Price', 'Low Price'])
+        self.display_table.setColumnCount(9)
+        self.display_table.setHorizontalHeaderLabels(['Name', 'ID', 'Series', 'Release Date', 'Market Price', 'High Price', 'Mid Price', 'Low Price', 'Owned'])
         self.display_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.display_table.itemDoubleClicked.connect(self.on_row_double_clicked)
+        self.display_table.currentCellChanged.connect(self.on_result_selected)
+        self.display_table.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
         vbox_table.addWidget(self.display_table)
 
         # Pagination controls for the Display table
@@ -201,6 +455,12 @@ class PokemonCardApp(QMainWindow):
         nav_layout.addWidget(self.next_button)
         vbox.addLayout(nav_layout)
 
+        # Card details (rules text, attacks, rarity) of the selected result
+        self.detail_pane = QTextEdit(self)
+        self.detail_pane.setReadOnly(True)
+        self.detail_pane.setPlaceholderText("Select a card to see its details")
+        vbox.addWidget(self.detail_pane)
+
         hbox.addLayout(vbox,2)
 
         layout.addLayout(hbox)
@@ -220,6 +480,200 @@ class PokemonCardApp(QMainWindow):
         self.setWindowTitle('Pokemon Card Search')
         self.resize(1400, 800)
 
+        # F12 opens the timings debug panel
+        self.timings_shortcut = QShortcut(QKeySequence(Qt.Key_F12), self)
+        self.timings_shortcut.activated.connect(self.show_timings)
+
+    def load_catalog(self):
+        # Read the catalog on a worker thread; search is enabled once it arrives
+        self.catalog_loader = CatalogLoader(self.inventory_path, self)
+        self.catalog_loader.loaded.connect(self.on_catalog_loaded)
+        self.catalog_loader.failed.connect(self.on_catalog_failed)
+        self.catalog_loader.collections_loaded.connect(self.on_collections_loaded)
+        self.catalog_loader.start()
+
+    def set_catalog_ready(self, ready):
+        for widget in (self.search_button, self.filters_button):
+            widget.setEnabled(ready)
+        if not ready:
+            self.input_field.setPlaceholderText("Loading card catalog...")
+        else:
+            self.update_input_placeholder()
+
+    def on_catalog_loaded(self, catalog):
+        from search import CardSearchEngine
+        self.catalog = catalog
+        self.search_engine = CardSearchEngine(catalog, read_scoring_processes())
+        self.set_catalog_ready(True)
+        if catalog.details() is not None:
+            self.detail_loader.prepare(catalog.details())
+        logging.info(f'Catalog ready after {time.perf_counter() - START_TIME:.3f}s ({len(catalog)} cards).')
+
+    def set_collections_ready(self, ready):
+        # The collection actions price and look up cards, so they wait for the catalog as well as the collection
+        for widget in (self.view_collection_button, self.add_to_collection_button, self.change_inventory_button,
+                       self.new_inventory_button, self.collection_combo, self.collection_value_button,
+                       self.refresh_prices_button, self.export_button, self.check_deck_button):
+            widget.setEnabled(ready)
+
+    def on_collections_loaded(self, collections):
+        self.collections = collections
+        self.set_collections_ready(True)
+        collection = collections.collections.get(collections.key(self.inventory_path))  # None if it couldn't be read
+        if collection is not None:
+            self.inventory_model = self.create_inventory_model(collection)
+        self.set_owned(collection.owned() if collection is not None else {})
+        self.refresh_collection_combo()
+        self.watch_inventory()
+
+    def create_inventory_model(self, collection):
+        model = InventoryModel(collection, self)
+        for signal in (model.row_added, model.row_changed, model.row_removed, model.reset):
+            signal.connect(self.on_inventory_changed)
+        model.save_failed.connect(lambda error: QMessageBox.critical(self, "Error", f"Failed to save the collection. Error: {error}"))
+        return model
+
+    def on_inventory_changed(self, *args):
+        # Whichever window changed the collection, the Owned column follows
+        self.set_owned(self.inventory_model.collection.owned())
+
+    def set_owned(self, owned):
+        self.owned = owned
+        self.refresh_owned_column()
+
+    def active_collection(self):
+        """The collection cards are added to, read again only if its file changed; None if it can't be read."""
+        try:
+            return self.collections.active()
+        except Exception as e:
+            logging.exception('Failed to read the collection %s.', self.collections.active_path)
+            QMessageBox.critical(self, "Error", f"Failed to read the collection. Error: {str(e)}")
+            return None
+
+    def active_model(self):
+        """The InventoryModel of the active collection, or None if the collection can't be read."""
+        collection = self.active_collection()
+        if collection is None:
+            return None
+        if self.inventory_model is None:
+            self.inventory_model = self.create_inventory_model(collection)
+        elif self.inventory_model.collection is not collection:
+            # Another collection, or the file changed and was read again
+            self.inventory_model.set_collection(collection)
+        return self.inventory_model
+
+    def switch_collection(self, inventory_path):
+        """Makes another collection active; one opened before comes from the cache."""
+        if self.inventory_model is not None:
+            self.inventory_model.save()
+        write_ini_file(inventory_path)
+        self.inventory_path = inventory_path
+        self.collections.active_path = inventory_path
+        model = self.active_model()
+        self.set_owned(model.collection.owned() if model is not None else {})
+        self.refresh_collection_combo()
+        self.watch_inventory()
+        return model
+
+    def watch_inventory(self):
+        if self.inventory_watcher.files():
+            self.inventory_watcher.removePaths(self.inventory_watcher.files())
+        if os.path.exists(self.inventory_path):
+            self.inventory_watcher.addPath(self.inventory_path)
+
+    def on_inventory_file_changed(self, path):
+        # A file replaced by a sync client or an editor stops being watched, so watch the new one
+        if path not in self.inventory_watcher.files() and os.path.exists(path):
+            self.inventory_watcher.addPath(path)
+        self.inventory_reload.start()
+
+    def check_inventory_file(self):
+        """Applies the rows changed in the active collection's file since it was read or written here."""
+        model = self.inventory_model
+        if model is None or self.resolving_conflict:
+            return  # The check after the conflict dialog closes picks up changes made while it is open
+        changes = self.inventory_changes(model)
+        if changes is None:
+            return
+        if model.collection.dirty:
+            # A pending save would write the local rows over the file while the user is still choosing
+            model.save_timer.stop()
+            self.resolving_conflict = True
+            try:
+                keep = self.keep_local_changes(model.collection, changes[2])
+            finally:
+                self.resolving_conflict = False
+            if keep:
+                model.save()
+                return
+            # The file may have changed again while the dialog was open
+            changes = self.inventory_changes(model)
+            if changes is None:
+                return
+        inventory, stamp, diff = changes
+        model.apply_diff(inventory, stamp, diff)
+        if diff:
+            logging.info('Applied %d changed rows from %s.', len(diff), model.collection.path)
+            self.show_fading_message(f"Collection updated from disk: {len(diff)} rows changed.")
+
+    def inventory_changes(self, model):
+        # Collection.changes_on_disk(), or None when the file is unchanged or can't be read yet
+        try:
+            return model.collection.changes_on_disk()
+        except Exception:
+            # Most likely still being written; the rest of the write fires another change
+            logging.warning('Could not read the changed collection %s.', model.collection.path, exc_info=True)
+            return None
+
+    def keep_local_changes(self, collection, diff):
+        """Asks whether unsaved edits win over a file changed elsewhere; True keeps them."""
+        box = QMessageBox(QMessageBox.Warning, "Collection Changed",
+                          f"{collection.name} was changed outside CardLog ({len(diff)} rows differ) while you have changes that "
+                          "aren't saved yet.\n\nKeep your changes and overwrite the file, or load the file and discard your changes?",
+                          parent=self)
+        keep = box.addButton("Keep My Changes", QMessageBox.AcceptRole)
+        box.addButton("Load the File", QMessageBox.DestructiveRole)
+        box.exec_()
+        return box.clickedButton() is keep
+
+    def is_active(self, inventory_path):
+        return self.collections.key(inventory_path) == self.collections.key(self.inventory_path)
+
+    def refresh_collection_combo(self):
+        self.collection_combo.blockSignals(True)
+        self.collection_combo.clear()
+        for path in self.collections.paths():
+            self.collection_combo.addItem(os.path.splitext(os.path.basename(path))[0], path)
+            if self.is_active(path):
+                self.collection_combo.setCurrentIndex(self.collection_combo.count() - 1)
+        self.collection_combo.blockSignals(False)
+
+    def on_collection_picked(self, index):
+        inventory_path = self.collection_combo.itemData(index)
+        if inventory_path and not self.is_active(inventory_path):
+            # An open collection window follows the model to the new collection
+            self.switch_collection(inventory_path)
+
+    def refresh_owned_column(self):
+        # Only the rows on screen; the counts come from self.owned, not the file
+        from inventory import owned_label
+        for index, card in enumerate(self.page_records):
+            self.display_table.setItem(index, 8, QTableWidgetItem(owned_label(self.owned, card['id'])))
+
+    def on_catalog_failed(self, error):
+        self.input_field.setPlaceholderText("Card catalog failed to load")
+        QMessageBox.critical(self, "Error", f"Failed to load the card catalog. Error: {error}")
+
+    def log_first_paint(self):
+        logging.info(f'Time to first paint: {time.perf_counter() - START_TIME:.3f}s.')
+
+    def show_timings(self):
+        if not hasattr(self, 'timings_panel') or self.timings_panel is None:
+            self.timings_panel = TimingsPanel(self)
+        self.timings_panel.refresh()
+        self.timings_panel.show()
+        self.timings_panel.raise_()
+
     def update_input_placeholder(self):
         search_method = self.search_method_combo.currentText()
         if search_method == 'Set Number':
@@ -231,16 +685,114 @@ class PokemonCardApp(QMainWindow):
         else:  # Pokedex
             self.input_field.setPlaceholderText("Enter Pokedex #")
 
+    def on_search_text_changed(self, text):
+        if self.live_search_checkbox.isChecked() and self.catalog is not None:
+            self.search_debounce.start()  # Restarts the timer on every keystroke
+
+    def start_live_search(self):
+        query = self.input_field.text().strip()
+        # One letter matches most of the catalog; wait for more unless it's a set number
+        if len(query) < 2 and not query.isdigit():
+            return
+        self.current_page = 0
+        card_type = self.card_type_group.checkedButton().text()
+        self.search_worker.submit(self.search_engine, query, card_type, self.page_size, self.image_cache, **self.search_options())
+
+    def on_live_search_finished(self, generation, query, records, image_data):
+        # Drop results for anything but the latest query and the text still in the box
+        if generation != self.search_worker.generation or query != self.input_field.text().strip():
+            return
+        card_type = self.card_type_group.checkedButton().text()
+        if records and records[0]['card_type'] != card_type:
+            records = self.search_engine.reprice(records, card_type)
+        self.card_search.show_results(records, image_data=image_data, quiet=True)
+
+    def closeEvent(self, event):
+        self.search_worker.shutdown()
+        self.detail_loader.shutdown()
+        if self.inventory_model is not None:
+            self.inventory_model.save()
+        if self.search_engine is not None:
+            self.search_engine.close()
+        super().closeEvent(event)
+
     def search_card(self):
+        if self.catalog is None:
+            return
+        # An explicit search replaces any search-as-you-type query still pending
+        self.search_debounce.stop()
+        self.search_worker.cancel()
         # Delegate the search functionality to the CardSearch instance
         self.card_search.search_card()
+        if not self.first_search_logged:
+            self.first_search_logged = True
+            logging.info(f'Time to first search: {time.perf_counter() - START_TIME:.3f}s.')
+
+    def on_card_type_changed(self):
+        # A price range filter or a price sort depends on the finish; otherwise only the price columns change.
+        # Either way there is only a new search if the input has text, so the rows shown are repriced when there isn't
+        refiltered = self.facet_index is not None and self.filter_panel.on_finish_changed()
+        if not self.input_field.text().strip():
+            self.reprice_results()
+        elif not refiltered and self.sort_by in ('market', 'low', 'mid', 'high'):
+            self.initiate_search()
+        elif not refiltered:
+            self.reprice_results()
+
+    def reprice_results(self):
+        # Keeps the rows, the image and the selection; only the price cells are rewritten
+        if not self.page_records or self.search_engine is None:
+            return
+        self.page_records = self.search_engine.reprice(self.page_records, self.card_type_group.checkedButton().text())
+        for index, card in enumerate(self.page_records):
+            for column, field in zip(range(4, 8), ('market', 'high', 'mid', 'low')):
+                self.display_table.item(index, column).setText(card[field])
+
+    def search_options(self):
+        return {'row_filter': self.row_filter, 'sort_by': self.sort_by, 'descending': self.sort_descending}
+
+    def on_header_clicked(self, column):
+        # Sorting is done by the search engine over all results, not just the rows on this page
+        sort_by = SORT_COLUMNS.get(column)
+        if sort_by is None:
+            return
+        if sort_by == self.sort_by and sort_by != 'relevance':
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_by = sort_by
+            self.sort_descending = sort_by != 'set'  # Most expensive and newest first, sets alphabetically
+        header = self.display_table.horizontalHeader()
+        header.setSortIndicatorShown(sort_by != 'relevance')
+        header.setSortIndicator(column, Qt.DescendingOrder if self.sort_descending else Qt.AscendingOrder)
+        if self.input_field.text().strip():
+            self.initiate_search()
 
     def on_row_double_clicked(self, item):
         # Slot to handle double-clicking a row in the table
         self.current_image_index = item.row()
         self.update_image()
 
-    def update_image(self):
+    def on_result_selected(self, row, column, previous_row, previous_column):
+        from card_details import format_details
+        if row < 0 or row >= len(self.page_records) or self.page_records[row]['id'] == self.detail_card_id:
+            return
+        card = self.page_records[row]
+        self.detail_card_id = card['id']
+        store = self.catalog.details() if self.catalog is not None else None
+        if store is None:
+            self.detail_pane.setPlainText(format_details(card, None))
+            return
+        self.detail_pane.setPlainText(f"{card['name']}  ({card['id']})\n\nLoading details...")
+        self.detail_loader.request(store, card['id'])
+
+    def on_details_loaded(self, card_id, details):
+        from card_details import format_details
+        row = self.display_table.currentRow()
+        if 0 <= row < len(self.page_records) and self.page_records[row]['id'] == card_id:
+            self.detail_pane.setPlainText(format_details(self.page_records[row], details))
+
+    def update_image(self, image_data=None):
+        # image_data is the already downloaded image, if the caller has it
         if self.image_urls:
             image_url = self.image_urls[self.current_image_index]
             
@@ -248,9 +800,13 @@ class PokemonCardApp(QMainWindow):
             if image_url in self.image_cache:
                 self.original_pixmap = self.image_cache[image_url]
             else:
-                response = requests.get(image_url)
-                self.original_pixmap = QPixmap()
-                self.original_pixmap.loadFromData(response.content)
+                if image_data is None:
+                    import requests
+                    with span('image fetch'):
+                        image_data = requests.get(image_url).content
+                with span('image decode'):
+                    self.original_pixmap = QPixmap()
+                    self.original_pixmap.loadFromData(image_data)
                 
                 # Cache the downloaded image
                 self.image_cache[image_url] = self.original_pixmap
@@ -271,9 +827,10 @@ class PokemonCardApp(QMainWindow):
 
     def apply_zoom(self):
         if self.original_pixmap:
-            new_size = self.original_pixmap.size() * self.zoom_factor
-            scaled_pixmap = self.original_pixmap.scaled(new_size, Qt.KeepAspectRatio)
-            self.image_label.setPixmap(scaled_pixmap)
+            with span('zoom'):
+                new_size = self.original_pixmap.size() * self.zoom_factor
+                scaled_pixmap = self.original_pixmap.scaled(new_size, Qt.KeepAspectRatio)
+                self.image_label.setPixmap(scaled_pixmap)
 
     def initiate_search(self):
         self.current_page = 0
@@ -336,59 +893,29 @@ class PokemonCardApp(QMainWindow):
             selected_row = self.display_table.currentRow()
             
             # Check if a row is selected and the cell contains a valid item
-            if selected_row != -1 and self.display_table.item(selected_row, 1):
-                card_id = self.display_table.item(selected_row, 1).text()  # Get the ID from the second column of the table
-                
-                if card_id:
-                    # Extract the card details from the search results table
-                    card_details = {
-                        'Name': self.display_table.item(selected_row, 0).text(),
-                        'ID': card_id,
-                        'Series': self.display_table.item(selected_row, 2).text(),
-                        'Release Date': self.display_table.item(selected_row, 3).text(),
-                        'Market Price': self.display_table.item(selected_row, 4).text(),
-                        'High Price': self.display_table.item(selected_row, 5).text(),
-                        'Mid Price': self.display_table.item(selected_row, 6).text(),
-                        'Low Price': self.display_table.item(selected_row, 7).text(),
-                        'Card Type': self.card_type_group.checkedButton().text()
-                    }
-                    
+            if selected_row != -1 and selected_row < len(self.page_records):
+                from catalog import CARD_TYPES
+                from inventory import inventory_row
+
+                # Take the card details from the search result shown in that row
+                card_details = inventory_row(self.page_records[selected_row])
+
+                if card_details['ID']:
                     # Check if card + card type combo is valid
-                    if card_details['Market Price'] == '-' and \
-                       card_details['High Price'] == '-' and \
-                       card_details['Mid Price'] == '-' and \
-                       card_details['Low Price'] == '-':
+                    row = self.search_engine.table.row_of(card_details['ID'])
+                    if row is None or not self.catalog.finish_exists(row, CARD_TYPES[card_details['Card Type']]):
                         self.show_fading_message(f"Card {card_details['Card Type']} does not exist.", 3000)
                         self.message_label.setStyleSheet("background-color: red; border: 1px solid black; padding: 10px;")
                         return
 
-                    # Convert to DataFrame for easier handling
-                    card_df = pd.DataFrame([card_details])
-                    
-                    if os.path.exists(INVENTORY_FILE):
-                        inventory = pd.read_excel(INVENTORY_FILE)
-                        
-                        # Handle case if 'ID' column and 'Card Type' doesn't exist in the inventory file
-                        if 'ID' not in inventory.columns or 'Card Type' not in inventory.columns:
-                            inventory = pd.DataFrame(columns=card_details.keys())
-                        
-                        # Check if the card already exists in the inventory with the specified card type
-                        existing_card = inventory[(inventory['ID'] == card_id) & (inventory['Card Type'] == card_details['Card Type'])]
-                        if not existing_card.empty:
-                            # If card exists, increase the count
-                            index = existing_card.index[0]
-                            inventory.at[index, 'Count'] += 1
-                            self.show_fading_message('Card count increased in collection.')
-                        else:
-                            card_df['Count'] = 1
-                            inventory = pd.concat([inventory, card_df])
-                            self.show_fading_message('Card added to collection.')
-                        
-                        inventory.to_excel(INVENTORY_FILE, index=False)
-                    else:
-                        card_df['Count'] = 1
-                        card_df.to_excel(INVENTORY_FILE, index=False)
+                    # The model updates the Owned column and an open collection window; the file is written shortly after
+                    model = self.active_model()
+                    if model is None:
+                        return
+                    if model.add_card(card_details):
                         self.show_fading_message('Card added to collection.')
+                    else:
+                        self.show_fading_message('Card count increased in collection.')
                 else:
                     self.show_fading_message('Card ID extraction failed. Try again.')
             else:
@@ -402,7 +929,7 @@ class PokemonCardApp(QMainWindow):
         self.display_area.setTextCursor(cursor)
 
     def view_inventory(self):
-        inventory_path = read_ini_file() # Read the inventory file path from the ini file
+        inventory_path = self.inventory_path
         if not os.path.exists(inventory_path):
             choice, ok = QInputDialog.getItem(self, "Inventory Selection", "Do you want to:", ["Select an existing inventory file", "Create a new inventory file"], 0, False)
             if not ok:
@@ -411,7 +938,7 @@ class PokemonCardApp(QMainWindow):
                 options = QFileDialog.Options()
                 filePath, _ = QFileDialog.getOpenFileName(self, "Select Inventory File", "", "Excel Files (*.xlsx);;CSV Files (*.csv);;All Files (*)", options=options)
                 if filePath:
-                    write_ini_file(filePath)
+                    inventory_path = filePath
                 else:
                     QMessageBox.warning(self, "No Inventory File", "Please select a valid inventory file.")
                     return
@@ -419,19 +946,25 @@ class PokemonCardApp(QMainWindow):
                 file_name, ok = QInputDialog.getText(self, "New Inventory File", "Enter the name for the new inventory file (without extension):")
                 if ok and file_name:
                     # Assuming you want to create an Excel file, you can modify to support CSV as well
-                    file_name_with_extension = file_name + ".xlsx"
-                    self.create_new_inventory(file_name_with_extension)
-                    write_ini_file(file_name_with_extension)
+                    inventory_path = file_name + ".xlsx"
+                    if not self.write_new_inventory(inventory_path):
+                        return
                 else:
                     QMessageBox.warning(self, "Invalid File Name", "Please provide a valid name for the new inventory file.")
                     return
             else:
                 return
 
-        # Pass the inventory path to the InventoryWindow
-        self.collection_window = InventoryWindow(self, inventory_path)
-        self.collection_window.load_inventory()
+        model = self.switch_collection(inventory_path)
+        if model is not None:
+            self.show_collection_window(model)
+
+    def show_collection_window(self, model):
+        # One window, which follows the model from collection to collection
+        if not hasattr(self, 'collection_window') or self.collection_window is None:
+            self.collection_window = InventoryWindow(self, model)
         self.collection_window.show()
+        self.collection_window.raise_()
 
     def create_new_inventory(self):
         # Ask the user for the file name and location
@@ -447,7 +980,12 @@ class PokemonCardApp(QMainWindow):
         if not file_name.endswith('.xlsx'):
             file_name += '.xlsx'
 
-        # Create the new inventory file
+        if self.write_new_inventory(file_name):
+            QMessageBox.information(self, "Success", f"New inventory created at {file_name}.")
+
+    def write_new_inventory(self, file_name):
+        """Creates an empty inventory file and makes it the active collection; returns False if it couldn't be written."""
+        import pandas as pd
         template_data = [
             ["Name", "ID", "Series", "Release Date", "Market Price", "High Price", "Mid Price", "Low Price", "Card Type", "Count"]
         ]
@@ -455,29 +993,119 @@ class PokemonCardApp(QMainWindow):
         
         try:
             df.to_excel(file_name, index=False)
-            QMessageBox.information(self, "Success", f"New inventory created at {file_name}.")
-            
-            # After successfully creating the inventory, update the .ini file with the path to this inventory.
-            write_ini_file(file_name)
-            
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to create new inventory. Error: {str(e)}")
+            return False
+
+        # After successfully creating the inventory, make it the active collection (this also updates the .ini file)
+        self.switch_collection(file_name)
+        return True
 
     def change_inventory(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Inventory File", "", "Excel Files (*.xlsx);;All Files (*)")
         
         if file_path:
-            # Close the current collection window
-            if hasattr(self, 'collection_window') and self.collection_window:
-                self.collection_window.close()
+            # Opens it alongside the collections already open, and shows it in the collection window
+            model = self.switch_collection(file_path)
+            if model is not None:
+                self.show_collection_window(model)
+
+    def show_collection_value(self):
+        if not os.path.exists(self.inventory_path):
+            QMessageBox.warning(self, "No Inventory File", "Please select a valid inventory file.")
+            return
+
+        from valuation import value_collection
+        model = self.active_model()
+        if model is None:
+            return
+        inventory = model.collection.inventory
+        if 'ID' not in inventory.columns or 'Card Type' not in inventory.columns or 'Count' not in inventory.columns:
+            QMessageBox.warning(self, "Invalid Inventory File", "The inventory file has no ID, Card Type or Count column.")
+            return
+
+        result = value_collection(inventory, self.catalog)
+        QMessageBox.information(self, "Collection Value", result.summary())
+
+    def refresh_prices(self):
+        inventory_path = self.inventory_path
+        if not os.path.exists(inventory_path):
+            QMessageBox.warning(self, "No Inventory File", "Please select a valid inventory file.")
+            return
+
+        from valuation import refresh_prices
+        model = self.active_model()
+        if model is None:
+            return
+        try:
+            repriced, report = refresh_prices(model.collection.inventory, self.catalog)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to refresh prices. Error: {str(e)}")
+            return
+
+        # Only the repriced rows are redrawn in an open collection window
+        if report.rows_changed:
+            model.replace(repriced, report.changes.index)
+        QMessageBox.information(self, "Refresh Prices", report.summary())
 
-            # If necessary, update the .ini file with the new inventory path
-            write_ini_file(file_path)
+    def export_collection(self):
+        model = self.active_model()
+        if model is None:
+            return
+        file_name, chosen_filter = QFileDialog.getSaveFileName(
+            self, "Export Collection", os.path.splitext(self.inventory_path)[0] + ".csv",
+            "CSV Files (*.csv);;Parquet Files (*.parquet);;JSON Lines Files (*.jsonl)")
+        if not file_name:
+            return
+        from export import export_format, export_inventory
+        try:
+            export_format(file_name)
+        except ValueError:
+            # No known extension typed; use the one of the chosen filter
+            file_name += chosen_filter[chosen_filter.index('*') + 1:-1]
 
-            # Create and show a new collection window
-            self.collection_window = InventoryWindow(self, file_path) # Pass the file_path to the InventoryWindow constructor
-            self.collection_window.load_inventory()
-            self.collection_window.show()
+        # The rows in memory, so edits not saved yet are exported too; prices are the catalog's current ones
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            rows = export_inventory(model.collection.inventory, file_name, self.catalog)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export the collection. Error: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.show_fading_message(f"Exported {rows} rows to {os.path.basename(file_name)}.")
+
+    def check_deck(self):
+        deck_list, ok = QInputDialog.getMultiLineText(self, "Check Deck", "Paste a deck list (e.g. 4 Charizard ex OBF 125):")
+        if not ok or not deck_list.strip():
+            return
+
+        from deck import DeckResolver, parse_deck
+        entries = parse_deck(deck_list)
+        if not entries:
+            QMessageBox.warning(self, "Check Deck", "No cards found in the deck list.")
+            return
+        if self.deck_resolver is None:
+            self.deck_resolver = DeckResolver(self.catalog)
+        model = self.active_model()
+        if model is None:
+            return
+        QMessageBox.information(self, "Check Deck", self.deck_resolver.check(entries, model.collection.owned()).summary())
+
+    def show_filters(self):
+        if self.facet_index is None:
+            from facets import FacetIndex
+            self.facet_index = FacetIndex(self.catalog)
+            self.filter_panel = FilterPanel(self, self.facet_index)
+            self.filter_panel.changed.connect(self.on_filters_changed)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.filter_panel)
+        self.filter_panel.show()
+        self.filter_panel.raise_()
+
+    def on_filters_changed(self, row_filter):
+        self.row_filter = row_filter
+        if self.input_field.text().strip():
+            self.initiate_search()
 
     def prev_image(self):
         if self.image_urls:
@@ -501,257 +1129,223 @@ class PokemonCardApp(QMainWindow):
             self.update_image()
             self.display_table.selectRow(self.current_image_index)
 
+class TimingsPanel(QDialog):
+    """Debug panel with p50/p95/p99 latencies of every search and image phase."""
+    def __init__(self, parent_app):
+        super().__init__(parent_app)
+        self.parent_app = parent_app
+        self.setWindowTitle('Timings')
+        self.resize(620, 420)
+
+        layout = QVBoxLayout(self)
+        self.report = QTextEdit(self)
+        self.report.setReadOnly(True)
+        self.report.setFont(QFont('Courier New', 9))
+        layout.addWidget(self.report)
+
+        buttons = QHBoxLayout()
+        self.histograms_checkbox = QCheckBox('Show histograms', self)
+        self.histograms_checkbox.toggled.connect(self.refresh)
+        buttons.addWidget(self.histograms_checkbox)
+        refresh_button = QPushButton('Refresh', self)
+        refresh_button.clicked.connect(self.refresh)
+        buttons.addWidget(refresh_button)
+        reset_button = QPushButton('Reset', self)
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        catalog = self.parent_app.catalog
+        header = f"Catalog: {len(catalog)} cards\n\n" if catalog is not None else "Catalog: loading\n\n"
+        self.report.setPlainText(header + timings.report(histograms=self.histograms_checkbox.isChecked()))
+
+    def reset(self):
+        timings.reset()
+        self.refresh()
+
+class FilterPanel(QDockWidget):
+    """Facet filters (set, series, rarity, supertype, type, release year, price) with live match counts."""
+    changed = pyqtSignal(object)  # row mask of the active filters, or None
+
+    def __init__(self, parent_app, facet_index):
+        super().__init__("Filters", parent_app)
+        from facets import FACETS, FACET_TITLES, FacetSelection
+        self.parent_app = parent_app
+        self.index = facet_index
+        self.selection = FacetSelection()
+        self.updating = False
+        self.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
+        self.setMinimumWidth(220)
+
+        panel = QWidget(self)
+        layout = QVBoxLayout(panel)
+        self.lists = {}
+        for facet in FACETS:
+            layout.addWidget(QLabel(FACET_TITLES[facet], panel))
+            values = QListWidget(panel)
+            for code in sorted(range(len(facet_index.labels[facet])), key=lambda code: facet_index.labels[facet][code]):
+                item = QListWidgetItem(facet_index.labels[facet][code])
+                item.setData(Qt.UserRole, code)
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Unchecked)
+                values.addItem(item)
+            values.itemChanged.connect(self.on_changed)
+            layout.addWidget(values)
+            self.lists[facet] = values
+
+        # A range bound at its lowest value means "no bound"
+        ranges = QFormLayout()
+        first_year, last_year = facet_index.year_range()
+        self.year_from = QSpinBox(panel)
+        self.year_to = QSpinBox(panel)
+        for spin_box, value in ((self.year_from, first_year), (self.year_to, last_year)):
+            spin_box.setRange(first_year, last_year)
+            spin_box.setValue(value)
+            spin_box.valueChanged.connect(self.on_changed)
+        ranges.addRow('Released from', self.year_from)
+        ranges.addRow('Released to', self.year_to)
+        self.price_min = QDoubleSpinBox(panel)
+        self.price_max = QDoubleSpinBox(panel)
+        for spin_box in (self.price_min, self.price_max):
+            spin_box.setRange(0, 100000)
+            spin_box.setPrefix('$')
+            spin_box.setSpecialValueText('Any')
+            spin_box.valueChanged.connect(self.on_changed)
+        ranges.addRow('Price from', self.price_min)
+        ranges.addRow('Price to', self.price_max)
+        layout.addLayout(ranges)
+
+        self.in_finish = QCheckBox('Only cards that exist in the card type', panel)
+        self.in_finish.toggled.connect(self.on_changed)
+        layout.addWidget(self.in_finish)
+
+        clear_button = QPushButton('Clear Filters', panel)
+        clear_button.clicked.connect(self.clear)
+        layout.addWidget(clear_button)
+        self.setWidget(panel)
+
+        self.refresh_counts()
+
+    def read_selection(self):
+        from catalog import CARD_TYPES
+        for facet, values in self.lists.items():
+            self.selection.values[facet] = {values.item(row).data(Qt.UserRole) for row in range(values.count())
+                                            if values.item(row).checkState() == Qt.Checked}
+        first_year, last_year = self.index.year_range()
+        self.selection.years = (self.year_from.value() if self.year_from.value() > first_year else None,
+                                self.year_to.value() if self.year_to.value() < last_year else None)
+        self.selection.prices = (self.price_min.value() or None, self.price_max.value() or None)
+        self.selection.finish = CARD_TYPES[self.parent_app.card_type_group.checkedButton().text()]
+        self.selection.in_finish = self.in_finish.isChecked()
+
+    def refresh_counts(self):
+        counts = self.index.counts(self.selection)
+        self.updating = True
+        try:
+            for facet, values in self.lists.items():
+                for row in range(values.count()):
+                    item = values.item(row)
+                    code = item.data(Qt.UserRole)
+                    item.setText(f"{self.index.labels[facet][code]} ({counts[facet][code]})")
+        finally:
+            self.updating = False
+
+    def on_changed(self, *args):
+        if self.updating:
+            return
+        self.read_selection()
+        self.refresh_counts()
+        self.changed.emit(self.index.mask(self.selection))
+
+    def on_finish_changed(self):
+        """Re-filters for the card type picked in the main window; returns True if the filter changed."""
+        # Only a price range and the card type filter depend on the finish
+        if self.selection.prices == (None, None) and not self.selection.in_finish:
+            return False
+        self.on_changed()
+        return True
+
+    def clear(self):
+        self.updating = True
+        try:
+            for values in self.lists.values():
+                for row in range(values.count()):
+                    values.item(row).setCheckState(Qt.Unchecked)
+            self.year_from.setValue(self.year_from.minimum())
+            self.year_to.setValue(self.year_to.maximum())
+            self.price_min.setValue(0)
+            self.price_max.setValue(0)
+            self.in_finish.setChecked(False)
+        finally:
+            self.updating = False
+        self.on_changed()
+
 class CardSearch:
     def __init__(self, parent):
         # Reference to the main app (PokemonCardApp)
         self.app = parent
 
-    @staticmethod
-    def custom_parser(tcgplayer_str):
-        # Default data structure
-        default_data = {
-            'url': None,
-            'updatedAt': None,
-            'prices': {
-                'normal': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
-                'holofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
-                'reverseHolofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
-                'firstEditionHolofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
-                'firstEditionNormal': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'}
-            }
-        }
-
-        # Check if tcgplayer_str is not a string or is blank
-        if not isinstance(tcgplayer_str, str) or tcgplayer_str.strip() == "":
-            no_data = default_data
-            for card_type, price_data in no_data['prices'].items():
-                for key in price_data:
-                    price_data[key] = 'no data'
-            return no_data
-
-        # Extract URL
-        url_pattern = r"url='(.*?)'"
-        match_url = re.search(url_pattern, tcgplayer_str)
-        url = match_url.group(1) if match_url else None
-
-        # Extract updatedAt
-        updated_pattern = r"updatedAt='(.*?)'"
-        match_updated_at = re.search(updated_pattern, tcgplayer_str)
-        updated_at = match_updated_at.group(1) if match_updated_at else None
-
-        # Helper function to extract price details
-        def extract_price(price_str):
-            patterns = {
-                'low': r"low=(\d+\.\d+)?",
-                'mid': r"mid=(\d+\.\d+)?",
-                'high': r"high=(\d+\.\d+)?",
-                'market': r"market=(\d+\.\d+)?",
-                'directLow': r"directLow=(\d+\.\d+|None)?"
-            }
-
-            extracted_prices = {}
-            for key, pattern in patterns.items():
-                match = re.search(pattern, price_str)
-                extracted_prices[key] = match.group(1) if match and match.group(1) != "None" else "-"
-
-            return extracted_prices
-
-        prices = {}
-        for card_type in ['normal', 'holofoil', 'reverseHolofoil', 'firstEditionHolofoil', 'firstEditionNormal']:
-            pattern = f"{card_type}\s*=\s*TCGPrice\((.*?)\)"
-            match = re.search(pattern, tcgplayer_str)
-            if match:
-                price_str = match.group(1)
-                prices[card_type] = extract_price(price_str)
-            else:
-                prices[card_type] = default_data['prices'][card_type]
-
-        # Check if all prices across all categories are '-'
-        no_data_for_all_categories = all(
-            all(price == '-' for price in price_data.values())
-            for price_data in prices.values()
-        )
-
-        # If no data for all categories, replace '-' with 'no data'
-        if no_data_for_all_categories:
-            for price_data in prices.values():
-                for key in price_data:
-                    price_data[key] = 'no data'
-
-        return {
-            'url': url,
-            'updatedAt': updated_at,
-            'prices': prices
-        }
-
-
-    def similar_name(self, input_name, names_list, n=10):
-        # Start with an empty list for matches
-        
-        # Check for an exact match
-        exact_matches = [name for name in names_list if input_name.lower() in name.lower()]
-        
-        # Get close matches using difflib if no exact matches are found
-        if not exact_matches:
-            close_matches = get_close_matches(input_name.lower(), [name.lower() for name in names_list], n=n)
-            close_matches = [name for name in names_list if name.lower() in close_matches]
-        else:
-            close_matches = []
-
-        # Combine exact matches and close matches
-        matches = exact_matches + close_matches
-        
-        return matches
-
-    def extract_market_price_for_holofoil(self, tcgplayer_str):
-        pattern = r"holofoil=TCGPrice\(.*?market=(\d+\.\d+)"
-        match = re.search(pattern, tcgplayer_str)
-        return float(match.group(1)) if match else None
-
-    def sort_cards(self, card, input_str):
-        # Create a SequenceMatcher object
-        seq_matcher = SequenceMatcher(None, card['name'], input_str)
-
-        # Get the similarity ratio
-        similarity_ratio = seq_matcher.ratio()
-        
-        # Exact match gets highest score
-        if card['name'] == input_str:
-            name_score = 1000
-        else:
-            # Use similarity ratio as the score, but penalize names longer than the input
-            name_score = similarity_ratio - 0.01 * (len(card['name']) - len(input_str))
-        
-        # Extracting set name for tertiary sorting
-        set_name_pattern = r"name=(['\"])(.*?)\1(?=[, ])"
-        match = re.search(set_name_pattern, card['set'])
-        card_set_name = match.group(2) if match else "Unknown Set"
-        
-        # Extracting release date for secondary sorting and convert it to a sortable format
-        release_date_pattern = r"releaseDate='(.*?)'"
-        match = re.search(release_date_pattern, card['set'])
-        if match:
-            year, month, day = match.group(1).split("/")
-            sortable_date = year + month + day
-        else:
-            # Default to an old date if not found
-            sortable_date = "20000101"
+    def search_card(self):
+        # Getting the search input
+        logging.debug('Getting the search input.')
+        input_str = self.app.input_field.text()
+        card_type = self.app.card_type_group.checkedButton().text()
 
-        # Return a tuple (name_score, -int(sortable_date), card_set_name) for sorting
-        return (name_score, int(sortable_date), card_set_name)
+        # The search itself runs in the headless engine; this only renders the current page
+        cards = self.app.search_engine.search(input_str, card_type, self.app.current_page, self.app.page_size,
+                                              **self.app.search_options())
+        self.show_results(cards)
 
-    def search_card(self):
-        # Resetting image URLs and current image index
+    def show_results(self, cards, image_data=None, quiet=False):
+        """Renders a page of result records; `quiet` skips the 'not found' dialog while typing."""
+        from inventory import owned_label
         self.app.image_urls = []
         self.app.current_image_index = 0
-
-        # Getting the search input
-        logging.info('Getting the search input.')
-        input_str = self.app.input_field.text()
-        logging.debug(f'Search input: {input_str}')
-
-        # Searching by name
-        logging.info('Searching by name.')
-        names_list = df['name'].unique().tolist()
-        similar_names = self.similar_name(input_str, names_list, n=10)
-        name_cards_df = df[df['name'].isin(similar_names)]
-
-        # Searching by set number
-        logging.info('Searching by set number.')
-        card_number_str = re.search(r"(\d+)", input_str)
-        if card_number_str:
-            card_number_str = card_number_str.group(1)
-            set_cards_df = df[df['number'].astype(str) == card_number_str]
-        else:
-            set_cards_df = pd.DataFrame()
-
-        # Filtering by set number format, e.g., '1/132'
-        if re.match(r"^\d+\s*/\s*\d+$", input_str):
-            set_number, total_set_number = map(int, re.split(r'\s*/\s*', input_str))
-            set_cards_df = set_cards_df[set_cards_df['printedTotal'] == total_set_number]
-
-        # Combining results from name search and set search
-        combined_cards_df = pd.concat([name_cards_df, set_cards_df])
-        logging.debug(f'Number of combined cards: {len(combined_cards_df)}')
-        combined_cards_df.drop_duplicates(inplace=True)
-        cards = sorted(combined_cards_df.to_dict(orient='records'), key=lambda card: self.sort_cards(card, input_str), reverse=True)
-        logging.debug('Sorting combined cards.')
-
-        # Implementing pagination
-        start_index = self.app.page_size * self.app.current_page
-        end_index = start_index + self.app.page_size
-        cards = cards[start_index:end_index]
-
-        # Convert button text to attribute name
-        btn_text_mapping = {
-            'normal': 'normal',
-            'holofoil': 'holofoil',
-            'reverse holofoil': 'reverseHolofoil',
-            '1st ed holofoil': 'firstEditionHolofoil',
-            '1st ed normal': 'firstEditionNormal'
-        }
-        selected_card_type = btn_text_mapping.get(self.app.card_type_group.checkedButton().text().lower(), 'normal')
+        self.app.page_records = cards
+        # New results start with no card selected, so the first click always loads its details
+        self.app.display_table.setCurrentCell(-1, -1)
+        self.app.detail_card_id = None
+        self.app.detail_pane.clear()
 
         # Displaying the results
         if cards:
-            self.app.display_table.setRowCount(len(cards))
-            for index, card in enumerate(cards):
-                card_name = card['name']
-                card_id = card['id']
-                set_name_pattern = r"name=(['\"])(.*?)\1(?=[, ])"
-                match = re.search(set_name_pattern, card['set'])
-                card_set_name = match.group(2) if match else "Unknown Set"
-
-                release_date_pattern = r"releaseDate='(.*?)'"
-                match = re.search(release_date_pattern, card['set'])
-                release_date = match.group(1) if match else "Unknown Date"
-
-                image_url_pattern = r"large='(.*?)'"
-                match = re.search(image_url_pattern, card['images'])
-                if match:
-                    image_url = match.group(1)
-                    self.app.image_urls.append(image_url)
-                else:
-                    # If the specific regex fails, try a more general approach
-                    general_image_url_pattern = r"large=.*?'(https://.*?\.png)'"
-                    gen_match = re.search(general_image_url_pattern, card['images'])
-                    if gen_match:
-                        image_url = gen_match.group(1)
-                        self.app.image_urls.append(image_url)
-
-                tcgplayer_data = CardSearch.custom_parser(card['tcgplayer'])
-                prices = tcgplayer_data['prices']
-                pricing = prices.get(selected_card_type, {})
-                market_price = pricing.get('market', "-")
-                high_price = pricing.get('high', "-")
-                mid_price = pricing.get('mid', "-")
-                low_price = pricing.get('low', "-")
-                    
-                # Setting the items for the table
-                self.app.display_table.setItem(index, 0, QTableWidgetItem(card_name))
-                self.app.display_table.setItem(index, 1, QTableWidgetItem(card_id))
-                self.app.display_table.setItem(index, 2, QTableWidgetItem(card_set_name))
-                self.app.display_table.setItem(index, 3, QTableWidgetItem(release_date))
-                self.app.display_table.setItem(index, 4, QTableWidgetItem(str(market_price)))
-                self.app.display_table.setItem(index, 5, QTableWidgetItem(str(high_price)))
-                self.app.display_table.setItem(index, 6, QTableWidgetItem(str(mid_price)))
-                self.app.display_table.setItem(index, 7, QTableWidgetItem(str(low_price)))
-
-            self.app.update_image()
-            logging.info('Updating the image.')
+            with span('table render'):
+                self.app.display_table.setRowCount(len(cards))
+                for index, card in enumerate(cards):
+                    if card['image_url']:
+                        self.app.image_urls.append(card['image_url'])
+
+                    # Setting the items for the table
+                    self.app.display_table.setItem(index, 0, QTableWidgetItem(card['name']))
+                    self.app.display_table.setItem(index, 1, QTableWidgetItem(card['id']))
+                    self.app.display_table.setItem(index, 2, QTableWidgetItem(card['set_name']))
+                    self.app.display_table.setItem(index, 3, QTableWidgetItem(card['release_date']))
+                    self.app.display_table.setItem(index, 4, QTableWidgetItem(card['market']))
+                    self.app.display_table.setItem(index, 5, QTableWidgetItem(card['high']))
+                    self.app.display_table.setItem(index, 6, QTableWidgetItem(card['mid']))
+                    self.app.display_table.setItem(index, 7, QTableWidgetItem(card['low']))
+                    self.app.display_table.setItem(index, 8, QTableWidgetItem(owned_label(self.app.owned, card['id'])))
+
+            self.app.update_image(image_data)
+            logging.debug('Updating the image.')
 
         else:
             # If no results are found
             self.app.display_table.setRowCount(0)
-            logging.warning('No cards found.')
-            QMessageBox.information(self.app, 'Information', 'Card not found.')
             self.app.image_label.clear()
+            if not quiet:
+                logging.warning('No cards found.')
+                QMessageBox.information(self.app, 'Information', 'Card not found.')
 
 class InventoryWindow(QMainWindow):
-    def __init__(self, parent_app=None, inventory_path=None):
+    # Columns after the inventory's own: Delete, +1 and -1 buttons
+    DELETE_COLUMN, ADD_COLUMN, SUBTRACT_COLUMN = 10, 11, 12
+
+    def __init__(self, parent_app=None, model=None):
         super(InventoryWindow, self).__init__()
         self.parent_app = parent_app
-        self.inventory_path = inventory_path
+        self.model = model  # InventoryModel of the active collection, shared with the main window
         
         # Set window attributes
         self.setWindowIcon(QIcon("pokemon.ico"))
@@ -787,99 +1381,81 @@ class InventoryWindow(QMainWindow):
         # Add the undo dock to the main window on the right
         self.addDockWidget(Qt.RightDockWidgetArea, self.undo_dock)
 
-
-        # Load the inventory from the Excel file
-        if os.path.exists(INVENTORY_FILE):
-            self.inventory = pd.read_excel(INVENTORY_FILE)
-        else:
-            self.inventory = pd.DataFrame()
+        # Rows are added, changed and removed one at a time as the model reports them
+        model.row_added.connect(self.on_row_added)
+        model.row_changed.connect(self.on_row_changed)
+        model.row_removed.connect(self.table.removeRow)
+        model.reset.connect(self.load_inventory)
+        # Undo steps refer to row positions, which changes from the file can move
+        model.reloaded.connect(self.action_log.clear)
 
         # Set the default size for the window
         self.resize(1200, 500)
+        self.load_inventory()
+
+    @property
+    def inventory(self):
+        return self.model.collection.inventory
 
     def load_inventory(self):
-        # Use the inventory_path attribute to load the inventory
-        if os.path.exists(self.inventory_path):
-            self.inventory = pd.read_excel(self.inventory_path)
-        else:
-            self.inventory = pd.DataFrame()
+        # Undo only applies to the collection it was done in
+        self.action_log = []
+        self.setWindowTitle(f'Card Collection - {self.model.collection.name}')
+        from inventory import INVENTORY_COLUMNS
 
         # Clear the table first
         self.table.setRowCount(0)
 
-        # Set the columns to match the DataFrame's columns
-        columns = ['Name', 'ID', 'Series', 'Release Date', 'Market Price', 'High Price', 'Mid Price', 'Low Price', 'Card Type', 'Count']
-
-        # Check if the required columns exist in the DataFrame
-        missing_columns = [col for col in columns if col not in self.inventory.columns]
-        if missing_columns:
-            # Create default columns if they're missing
-            for col in missing_columns:
-                self.inventory[col] = ""
-
         # Set the table column count and headers
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
-
-        # Filter the inventory to only consider the required columns
-        self.inventory = self.inventory[columns]
+        self.table.setColumnCount(len(INVENTORY_COLUMNS) + 3)
+        self.table.setHorizontalHeaderLabels(INVENTORY_COLUMNS + ["Delete", "Add", "Subtract"])
 
         # Load data from the inventory DataFrame
-        for index, row in self.inventory.iterrows():
-            self.table.insertRow(index)
-            for col, value in enumerate(row):
-                self.table.setItem(index, col, QTableWidgetItem(str(value)))
+        self.table.setRowCount(len(self.inventory))
+        for index in range(len(self.inventory)):
+            self.fill_row(index)
+            self.add_row_buttons(index)
 
         # Resize columns to fit content
         self.table.resizeColumnsToContents()
 
-        # Adding a delete button for each row
-        delete_btn_column = self.table.columnCount()
-        self.table.setColumnCount(delete_btn_column + 1)
-        self.table.setHorizontalHeaderItem(delete_btn_column, QTableWidgetItem("Delete"))
+    def fill_row(self, index):
+        for col, value in enumerate(self.inventory.iloc[index]):
+            self.table.setItem(index, col, QTableWidgetItem(str(value)))
 
-        for index in range(self.table.rowCount()):
-            delete_btn = QPushButton("Delete")
-            delete_btn.clicked.connect(lambda _, idx=index: self.delete_row(idx))
-            self.table.setCellWidget(index, delete_btn_column, delete_btn)
+    def add_row_buttons(self, index):
+        # Buttons look up their row when clicked, since rows above them can be removed
+        for column, text, action in ((self.DELETE_COLUMN, "Delete", self.delete_row), (self.ADD_COLUMN, "+1", self.add_to_count),
+                                     (self.SUBTRACT_COLUMN, "-1", self.subtract_from_count)):
+            button = QPushButton(text)
+            button.clicked.connect(lambda _, button=button, column=column, action=action: action(self.button_row(button, column)))
+            self.table.setCellWidget(index, column, button)
 
-        # Adding uptick and downtick buttons for each row
-        uptick_btn_column = self.table.columnCount()
-        self.table.setColumnCount(uptick_btn_column + 1)
-        self.table.setHorizontalHeaderItem(uptick_btn_column, QTableWidgetItem("Add"))
+    def button_row(self, button, column):
+        return next(row for row in range(self.table.rowCount()) if self.table.cellWidget(row, column) is button)
 
-        downtick_btn_column = self.table.columnCount()
-        self.table.setColumnCount(downtick_btn_column + 1)
-        self.table.setHorizontalHeaderItem(downtick_btn_column, QTableWidgetItem("Subtract"))
+    def on_row_added(self, index):
+        self.table.insertRow(index)
+        self.fill_row(index)
+        self.add_row_buttons(index)
 
-        for index in range(self.table.rowCount()):
-            # Add button
-            add_btn = QPushButton("+1")
-            add_btn.clicked.connect(lambda _, idx=index: self.add_to_count(idx))
-            self.table.setCellWidget(index, uptick_btn_column, add_btn)
+    def on_row_changed(self, index):
+        self.fill_row(index)
 
-            # Subtract button
-            subtract_btn = QPushButton("-1")
-            subtract_btn.clicked.connect(lambda _, idx=index: self.subtract_from_count(idx))
-            self.table.setCellWidget(index, downtick_btn_column, subtract_btn)
+    def count(self, index):
+        item = self.table.item(index, 9)
+        return int(float(item.text())) if item else 0
 
     def delete_row(self, index):
         card_name = self.table.item(index, 0).text() if self.table.item(index, 0) else "Unknown Card"
         card_type = self.table.item(index, 8).text() if self.table.item(index, 8) else "Unknown Type"
 
-        # Capture the data for the action log before deleting the row
+        # The model removes the row from the collection, and from this table through row_removed
         card_data = {
             "action": "delete",
-            "data": self.inventory.iloc[index].to_dict()
+            "data": self.model.remove_row(index)
         }
         
-        # Now, it's safe to remove the row
-        self.table.removeRow(index)
-        
-        self.inventory.drop(index, inplace=True)
-        self.inventory.reset_index(drop=True, inplace=True)  # Important to reset index after deletion
-        self.inventory.to_excel(INVENTORY_FILE, index=False)
-        
         if self.parent_app:
             self.parent_app.show_fading_message(f"{card_name} ({card_type}) removed from collection.")
 
@@ -894,40 +1470,31 @@ class InventoryWindow(QMainWindow):
         if last_action["action"] == "delete":
             # If the last action was a delete, add the card back to the inventory
             card_data = last_action["data"]
-            # Using concat instead of append
-            self.inventory = pd.concat([self.inventory, pd.DataFrame([card_data])], ignore_index=True)
-            self.inventory.to_excel(INVENTORY_FILE, index=False)
-            self.load_inventory()
+            self.model.append_row(card_data)
             if self.parent_app:
                 self.parent_app.show_fading_message(f"Undo: {card_data['Name']} ({card_data['Card Type']}) added back to collection.")
 
         elif last_action["action"] in ["add", "subtract"]:
-            index = last_action["index"]
-            previous_count = last_action["previous_count"]
-            self.table.item(index, 9).setText(str(previous_count))
-            self.update_inventory_file()
+            self.model.set_count(last_action["index"], last_action["previous_count"])
 
     def add_to_count(self, index):
         # Increment the count by 1
-        current_count = int(self.table.item(index, 9).text())
-        self.table.item(index, 9).setText(str(current_count + 1))
-        self.update_inventory_file()
+        current_count = self.count(index)
+        self.model.set_count(index, current_count + 1)
 
         # Log the addition action
         card_data = {
             "action": "add",
             "index": index,
-            "previous_count": int(self.table.item(index, 9).text()) - 1  # we subtract 1 because we've already increased the count
+            "previous_count": current_count
         }
         self.action_log.append(card_data)
 
     def subtract_from_count(self, index):
         # Decrement the count by 1. If count becomes 0, delete the row
-        item = self.table.item(index, 9)
-        current_count = int(item.text()) if item else 0
+        current_count = self.count(index)
         if current_count > 1:
-            self.table.item(index, 9).setText(str(current_count - 1))
-            self.update_inventory_file()
+            self.model.set_count(index, current_count - 1)
             
             # Log the subtraction action
             card_data = {
@@ -939,17 +1506,15 @@ class InventoryWindow(QMainWindow):
         else:
             self.delete_row(index)
 
-    def update_inventory_file(self):
-        # Update the inventory DataFrame from the table widget
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount() - 3):  # Excluding last 3 columns (buttons)
-                self.inventory.iat[row, col] = self.table.item(row, col).text()
-        self.inventory.to_excel(INVENTORY_FILE, index=False)
-
 
 # Running the app
 if __name__ == "__main__":
+    # Setting up logging; records are written to a rotating app.log off the GUI thread
+    setup_logging(read_log_level())
     app = QApplication([])
     window = PokemonCardApp()
     window.show()
+    QTimer.singleShot(0, window.log_first_paint)
+    window.load_catalog()
     app.exec_()
+    stop_logging()
@@ -0,0 +1,69 @@
+"""Optional multi-process backend for fuzzy name scoring on very large catalogs.
+
+The lowercase name table is split into one shard per process. Each shard
+is sent to its own worker once, when the worker starts. A query is scored
+against every shard in parallel and the per-shard top-k lists are merged.
+Scoring is exactly difflib.get_close_matches, and a global top-k is always
+among the per-shard top-ks, so the results match the serial path.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+# The shard held by this worker process
+shard_names = None
+
+
+def load_shard(names):
+    global shard_names
+    shard_names = names
+
+def shard_close_matches(word, n, cutoff):
+    """get_close_matches over this worker's shard, returning the (score, name) pairs."""
+    result = []
+    s = SequenceMatcher()
+    s.set_seq2(word)
+    for x in shard_names:
+        s.set_seq1(x)
+        if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff and s.ratio() >= cutoff:
+            result.append((s.ratio(), x))
+    return heapq.nlargest(n, result)
+
+
+class ShardedNameScorer:
+    """Scores queries against a name table sharded across a pool of processes."""
+    def __init__(self, names, processes=None):
+        self.names = names
+        self.processes = max(1, min(processes or os.cpu_count() or 1, len(names) or 1))
+        lowered = [name.lower() for name in names]
+        size = -(-len(lowered) // self.processes)
+        # One single-process executor per shard pins each shard to its own worker
+        self.workers = [ProcessPoolExecutor(max_workers=1, initializer=load_shard, initargs=(lowered[i:i + size],))
+                        for i in range(0, len(lowered), size)] if lowered else []
+
+    def close_matches(self, word, n=10, cutoff=0.6):
+        """Same result as difflib.get_close_matches(word, [name.lower() for name in names], n, cutoff)."""
+        futures = [worker.submit(shard_close_matches, word, n, cutoff) for worker in self.workers]
+        merged = heapq.nlargest(n, (pair for future in futures for pair in future.result()))
+        return [x for score, x in merged]
+
+    def similar_name(self, input_name, n=10):
+        """search.similar_name over the whole name table with the close-match scoring sharded."""
+        query = input_name.lower()
+        exact_matches = [name for name in self.names if query in name.lower()]
+        if exact_matches:
+            return exact_matches
+        close_matches = set(self.close_matches(query, n=n))
+        return [name for name in self.names if name.lower() in close_matches]
+
+    def close(self):
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,197 @@
+"""Append-only local store of TCGplayer price history.
+
+Prices are stored as zstd-compressed Parquet, partitioned by price date
+(price_history/date=YYYY-MM-DD/sync-<timestamp>.parquet). Each row is keyed
+by card id and finish. A sync is written chunk by chunk as it is fetched,
+each chunk's rows sorted by id into their own row groups, so row-group
+statistics let a per-card query skip almost everything it doesn't need.
+"""
+import logging
+import os
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from catalog import FINISHES, PRICE_FIELDS, price_column
+
+HISTORY_DIR = "price_history"
+ROW_GROUP_SIZE = 4096
+
+# Prices are float64 so a synced 360.12 reads back as 360.12; files written with float32 are widened on read
+FILE_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('finish', pa.dictionary(pa.int8(), pa.string())),
+] + [(field, pa.float64()) for field in PRICE_FIELDS])
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+
+def parse_price_date(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10].replace('-', '/'), '%Y/%m/%d').date()
+
+
+class PriceHistoryWriter:
+    """Appends one sync's prices to the store as they arrive.
+
+    Prices are buffered per price date only until the end of the chunk (or
+    ROW_GROUP_SIZE rows), then written through one open ParquetWriter per
+    partition, so memory doesn't grow with the catalog. Files are written
+    under a name the dataset skips and renamed on close, so a failed sync
+    appends nothing.
+    """
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self.buffers = {}
+        self.buffered = 0
+        self.writers = {}
+        self.written = 0
+        self.sync_id = time.strftime('%Y%m%dT%H%M%S')
+
+    def path(self, price_date, partial=False):
+        # Dataset discovery ignores files starting with '_'
+        name = f"{'_' if partial else ''}sync-{self.sync_id}.parquet"
+        return os.path.join(self.root, f"date={price_date.isoformat()}", name)
+
+    def add(self, card_id, updated_at, prices):
+        """Adds one card's prices; `prices` maps finish -> {field: value}."""
+        price_date = parse_price_date(updated_at)
+        if price_date is None:
+            return
+        buffer = self.buffers.setdefault(price_date, {name: [] for name in FILE_SCHEMA.names})
+        for finish in FINISHES:
+            values = prices.get(finish)
+            if not values or all(values.get(field) is None for field in PRICE_FIELDS):
+                continue
+            buffer['id'].append(card_id)
+            buffer['finish'].append(finish)
+            for field in PRICE_FIELDS:
+                buffer[field].append(values.get(field))
+            self.buffered += 1
+        if self.buffered >= ROW_GROUP_SIZE:
+            self.flush()
+
+    def add_rows(self, rows, columns):
+        """Adds flattened catalog rows (lists in `columns` order) as produced by the ingest pipeline, and writes them."""
+        position = {column: i for i, column in enumerate(columns)}
+        id_at = position['id']
+        updated_at = position['tcgplayer_updatedAt']
+        price_at = {finish: {field: position[price_column(finish, field)] for field in PRICE_FIELDS} for finish in FINISHES}
+        for row in rows:
+            prices = {finish: {field: row[i] for field, i in fields.items()} for finish, fields in price_at.items()}
+            self.add(row[id_at], row[updated_at], prices)
+        self.flush()
+
+    def flush(self):
+        """Writes the buffered rows to their partitions."""
+        for price_date, buffer in self.buffers.items():
+            table = pa.table(buffer, schema=FILE_SCHEMA).sort_by('id')
+            writer = self.writers.get(price_date)
+            if writer is None:
+                path = self.path(price_date, partial=True)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = self.writers[price_date] = pq.ParquetWriter(path, FILE_SCHEMA, compression='zstd')
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+            self.written += table.num_rows
+        self.buffers = {}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        for price_date, writer in self.writers.items():
+            writer.close()
+            os.replace(self.path(price_date, partial=True), self.path(price_date))
+        self.writers = {}
+        logging.info(f"Appended {self.written} price rows to {self.root}.")
+        return self.written
+
+    def abort(self):
+        """Drops everything written by this sync so far."""
+        for price_date, writer in self.writers.items():
+            writer.close()
+            path = self.path(price_date, partial=True)
+            os.remove(path)
+            if not os.listdir(os.path.dirname(path)):
+                os.rmdir(os.path.dirname(path))
+        self.writers = {}
+        self.buffers = {}
+        self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # Don't append a half-finished sync
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PriceHistory:
+    """Read side of the price history store."""
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+
+    def dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning=PARTITIONING, schema=FILE_SCHEMA.append(pa.field('date', pa.date32())))
+
+    def price_series(self, card_id, finish=None, field='market'):
+        """Returns the (date, finish, price) series of one card, oldest first."""
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=['date', 'finish', field])
+        condition = ds.field('id') == card_id
+        if finish:
+            condition = condition & (ds.field('finish') == finish)
+        table = self.dataset().to_table(columns=['date', 'finish', field], filter=condition)
+        series = table.to_pandas()
+        series['finish'] = series['finish'].astype(str)
+        # A date synced twice keeps its last value
+        series = series.drop_duplicates(['date', 'finish'], keep='last')
+        return series.sort_values(['finish', 'date']).reset_index(drop=True)
+
+    def latest_prices(self, dataset, condition, field):
+        table = dataset.to_table(columns=['id', 'finish', 'date', field], filter=condition & ds.field(field).is_valid())
+        prices = table.to_pandas(strings_to_categorical=True)
+        if len(prices) == 0:
+            return pd.DataFrame({'id': pd.Series(dtype=object), 'finish': pd.Series(dtype=object), field: pd.Series(dtype=float)})
+        # Keep the newest observation of every (id, finish), found with one lexsort over integer keys
+        key = prices['id'].cat.codes.to_numpy(np.int64) * len(FINISHES) + prices['finish'].cat.codes.to_numpy(np.int64)
+        order = np.lexsort((prices['date'].to_numpy(), key))
+        sorted_key = key[order]
+        last = np.append(sorted_key[1:] != sorted_key[:-1], True)
+        latest = prices.iloc[order[last]]
+        return pd.DataFrame({'id': latest['id'].astype(str).to_numpy(), 'finish': latest['finish'].astype(str).to_numpy(),
+                             field: latest[field].to_numpy()})
+
+    def biggest_movers(self, since, finish=None, field='market', limit=20):
+        """Returns the cards whose price moved the most between `since` and their latest price.
+
+        The baseline is each card's last price on or before `since`; cards
+        without a newer price are left out. Sorted by absolute change.
+        """
+        columns = ['id', 'finish', 'price_then', 'price_now', 'change', 'change_pct']
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+        since = pa.scalar(parse_price_date(since), pa.date32())
+        dataset = self.dataset()
+        condition = ds.field('finish') == finish if finish else ds.scalar(True)
+
+        before = self.latest_prices(dataset, condition & (ds.field('date') <= since), field)
+        after = self.latest_prices(dataset, condition & (ds.field('date') > since), field)
+        movers = after.rename(columns={field: 'price_now'}).merge(
+            before.rename(columns={field: 'price_then'}), on=['id', 'finish'], how='inner')
+
+        movers['change'] = movers['price_now'] - movers['price_then']
+        movers['change_pct'] = movers['change'] / movers['price_then'].where(movers['price_then'] != 0) * 100
+        order = movers['change'].abs().sort_values(ascending=False).index
+        return movers.loc[order, columns].head(limit).reset_index(drop=True)
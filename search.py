@@ -0,0 +1,355 @@
+"""Card search that runs without Qt: a query goes in, ranked card records come out."""
+import logging
+import re
+from difflib import get_close_matches, SequenceMatcher
+
+import numpy as np
+
+from catalog import CARD_TYPES, PRICE_COLUMNS, SET_NAME_PATTERN, RELEASE_DATE_PATTERN
+from timing import span
+
+
+def custom_parser(tcgplayer_str):
+    # Default data structure
+    default_data = {
+        'url': None,
+        'updatedAt': None,
+        'prices': {
+            'normal': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
+            'holofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
+            'reverseHolofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
+            'firstEditionHolofoil': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'},
+            'firstEditionNormal': {'low': '-', 'mid': '-', 'high': '-', 'market': '-', 'directLow': '-'}
+        }
+    }
+
+    # Check if tcgplayer_str is not a string or is blank
+    if not isinstance(tcgplayer_str, str) or tcgplayer_str.strip() == "":
+        no_data = default_data
+        for card_type, price_data in no_data['prices'].items():
+            for key in price_data:
+                price_data[key] = 'no data'
+        return no_data
+
+    # Extract URL
+    url_pattern = r"url='(.*?)'"
+    match_url = re.search(url_pattern, tcgplayer_str)
+    url = match_url.group(1) if match_url else None
+
+    # Extract updatedAt
+    updated_pattern = r"updatedAt='(.*?)'"
+    match_updated_at = re.search(updated_pattern, tcgplayer_str)
+    updated_at = match_updated_at.group(1) if match_updated_at else None
+
+    # Helper function to extract price details
+    def extract_price(price_str):
+        patterns = {
+            'low': r"low=(\d+\.\d+)?",
+            'mid': r"mid=(\d+\.\d+)?",
+            'high': r"high=(\d+\.\d+)?",
+            'market': r"market=(\d+\.\d+)?",
+            'directLow': r"directLow=(\d+\.\d+|None)?"
+        }
+
+        extracted_prices = {}
+        for key, pattern in patterns.items():
+            match = re.search(pattern, price_str)
+            extracted_prices[key] = match.group(1) if match and match.group(1) != "None" else "-"
+
+        return extracted_prices
+
+    prices = {}
+    for card_type in ['normal', 'holofoil', 'reverseHolofoil', 'firstEditionHolofoil', 'firstEditionNormal']:
+        pattern = rf"{card_type}\s*=\s*TCGPrice\((.*?)\)"
+        match = re.search(pattern, tcgplayer_str)
+        if match:
+            price_str = match.group(1)
+            prices[card_type] = extract_price(price_str)
+        else:
+            prices[card_type] = default_data['prices'][card_type]
+
+    # Check if all prices across all categories are '-'
+    no_data_for_all_categories = all(
+        all(price == '-' for price in price_data.values())
+        for price_data in prices.values()
+    )
+
+    # If no data for all categories, replace '-' with 'no data'
+    if no_data_for_all_categories:
+        for price_data in prices.values():
+            for key in price_data:
+                price_data[key] = 'no data'
+
+    return {
+        'url': url,
+        'updatedAt': updated_at,
+        'prices': prices
+    }
+
+def similar_name(input_name, names_list, n=10):
+    # Check for an exact match
+    exact_matches = [name for name in names_list if input_name.lower() in name.lower()]
+
+    # Get close matches using difflib if no exact matches are found
+    if not exact_matches:
+        close_matches = get_close_matches(input_name.lower(), [name.lower() for name in names_list], n=n)
+        close_matches = [name for name in names_list if name.lower() in close_matches]
+    else:
+        close_matches = []
+
+    # Combine exact matches and close matches
+    return exact_matches + close_matches
+
+def name_score(name, input_str):
+    # Exact match gets highest score
+    if name == input_str:
+        return 1000
+    # Use similarity ratio as the score, but penalize names longer than the input
+    return SequenceMatcher(None, name, input_str).ratio() - 0.01 * (len(name) - len(input_str))
+
+def sort_cards(card, input_str):
+    name_score_value = name_score(card['name'], input_str)
+
+    # Extracting set name for tertiary sorting
+    match = re.search(SET_NAME_PATTERN, card['set'])
+    card_set_name = match.group(2) if match else "Unknown Set"
+
+    # Extracting release date for secondary sorting and convert it to a sortable format
+    match = re.search(RELEASE_DATE_PATTERN, card['set'])
+    if match:
+        year, month, day = match.group(1).split("/")
+        sortable_date = year + month + day
+    else:
+        # Default to an old date if not found
+        sortable_date = "20000101"
+
+    # Return a tuple (name_score, int(sortable_date), card_set_name) for sorting
+    return (name_score_value, int(sortable_date), card_set_name)
+
+def image_url(card):
+    match = re.search(r"large='(.*?)'", card['images'])
+    if match:
+        return match.group(1)
+    # If the specific regex fails, try a more general approach
+    match = re.search(r"large=.*?'(https://.*?\.png)'", card['images'])
+    return match.group(1) if match else None
+
+def card_record(card, card_type='Normal'):
+    """Turns a catalog row into the record shown in the results table, priced for `card_type`."""
+    match = re.search(SET_NAME_PATTERN, card['set'])
+    set_name = match.group(2) if match else "Unknown Set"
+    match = re.search(RELEASE_DATE_PATTERN, card['set'])
+    release_date = match.group(1) if match else "Unknown Date"
+
+    pricing = custom_parser(card['tcgplayer'])['prices'].get(CARD_TYPES.get(card_type, 'normal'), {})
+    return {
+        'name': card['name'],
+        'id': card['id'],
+        'set_name': set_name,
+        'release_date': release_date,
+        'image_url': image_url(card),
+        'card_type': card_type,
+        'market': str(pricing.get('market', "-")),
+        'high': str(pricing.get('high', "-")),
+        'mid': str(pricing.get('mid', "-")),
+        'low': str(pricing.get('low', "-")),
+    }
+
+
+# Orders search results can be sorted in besides relevance; the prices are those of the searched finish
+SORT_KEYS = ['relevance', 'market', 'low', 'mid', 'high', 'release_date', 'set']
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search that was superseded by a newer query."""
+
+
+class CardSearchEngine:
+    """Name and set-number search over a Catalog.
+
+    With `processes` > 1 the close-match fallback is scored on a process
+    pool (see parallel_scoring), which is worth it for very large catalogs.
+    """
+    def __init__(self, catalog, processes=0):
+        self.catalog = catalog
+        self.table = catalog.card_table()
+        self.processes = processes
+        self._scorer = None
+        self._last_exact = None  # (lowercase query, its exact name matches) from the last search that had any
+        self._last_order = None  # (query and sort, row filter, row ids) of the last search, reused while paging
+        self._priced = None  # Whether each card has any price at all; cards without one show 'no data'
+
+    def names(self):
+        return self.table.names
+
+    def name_matches(self, input_str):
+        """Same names as similar_name() over the whole catalog."""
+        names = self.table.names
+        return [names[code] for code in self.name_match_codes(input_str)]
+
+    def name_match_codes(self, input_str):
+        """Name codes of the names similar_name() would return, in the same order.
+
+        When the query extends the previous one (search-as-you-type), only
+        the previous exact matches are scanned: a name containing the new
+        query must also contain the old one.
+        """
+        query = input_str.lower()
+        lower_names = self.table.lower_names
+        previous = self._last_exact
+        codes = previous[1] if previous is not None and previous[0] in query else range(len(lower_names))
+
+        exact_matches = [code for code in codes if query in lower_names[code]]
+        if exact_matches:
+            self._last_exact = (query, exact_matches)
+            return exact_matches
+
+        # No name contains the query anywhere, so fall back to close matches over the full list
+        if self.processes > 1:
+            return [self.table.name_index[name] for name in self.scorer().similar_name(input_str, n=10)]
+        close_matches = set(get_close_matches(query, lower_names, n=10))
+        return [code for code, name in enumerate(lower_names) if name in close_matches]
+
+    def scorer(self):
+        if self._scorer is None:
+            from parallel_scoring import ShardedNameScorer
+            self._scorer = ShardedNameScorer(self.names(), self.processes)
+        return self._scorer
+
+    def close(self):
+        """Shuts down the scoring processes, if any were started."""
+        if self._scorer is not None:
+            self._scorer.close()
+            self._scorer = None
+
+    def card(self, card_id):
+        """Returns the fields of the card with this ID as a dict, or None."""
+        row = self.table.row_of(card_id)
+        return self.table.card(row) if row is not None else None
+
+    def candidates(self, input_str):
+        """Returns the row ids of the cards matching the query by name or by set number, in catalog order."""
+        table = self.table
+
+        # Searching by name
+        logging.debug('Searching by name.')
+        with span('name match'):
+            name_rows = table.name_rows(self.name_match_codes(input_str))
+
+        # Searching by set number
+        logging.debug('Searching by set number.')
+        with span('number match'):
+            card_number_str = re.search(r"(\d+)", input_str)
+            if card_number_str:
+                set_mask = table.number_mask(card_number_str.group(1))
+
+                # Filtering by set number format, e.g., '1/132'
+                if re.match(r"^\d+\s*/\s*\d+$", input_str):
+                    set_number, total_set_number = map(int, re.split(r'\s*/\s*', input_str))
+                    set_mask &= table.printed_totals == total_set_number
+            else:
+                set_mask = None
+
+        # Combining results from name search and set search: name matches first, then the other number matches
+        with span('concat/dedupe'):
+            if set_mask is None:
+                rows = name_rows
+            else:
+                set_mask[name_rows] = False
+                rows = np.concatenate([name_rows, np.flatnonzero(set_mask)])
+            logging.debug('Number of combined cards: %d', len(rows))
+            return rows
+
+    def rank(self, input_str, cancelled=None, row_filter=None):
+        """Returns the row ids of the matching cards, best match first, ordered as sort_cards() orders them.
+
+        `cancelled` is checked between phases; when it returns True the
+        search stops with SearchCancelled. `row_filter` is an optional bool
+        mask over the table (see facets.FacetIndex.mask); rows outside it are
+        dropped before ranking.
+        """
+        logging.debug('Search input: %s', input_str)
+        rows = self.candidates(input_str)
+        if row_filter is not None:
+            rows = rows[row_filter[rows]]
+        if cancelled and cancelled():
+            raise SearchCancelled(input_str)
+        logging.debug('Sorting combined cards.')
+        with span('ranking'):
+            table = self.table
+            # Score each distinct name once rather than once per card
+            name_codes, inverse = np.unique(table.name_codes[rows], return_inverse=True)
+            scores = np.array([name_score(table.names[code], input_str) for code in name_codes], dtype=float)[inverse]
+            set_codes = table.set_codes[rows]
+            # lexsort is stable, so negated keys give the same order as sorted(..., reverse=True)
+            order = np.lexsort((-table.set_name_ranks[set_codes], -table.set_dates[set_codes], -scores))
+            return rows[order]
+
+    def reprice(self, records, card_type):
+        """The same result records priced for another card type, from the catalog's price columns.
+
+        Gives the prices card_record() would for `card_type` without parsing
+        the tcgplayer column or searching again.
+        """
+        finish = CARD_TYPES.get(card_type, 'normal')
+        if self._priced is None:
+            self._priced = ~np.isnan(self.catalog.prices()[PRICE_COLUMNS].to_numpy(dtype=float)).all(axis=1)
+        repriced = []
+        for record in records:
+            record = dict(record, card_type=card_type)
+            row = self.table.row_of(record['id'])
+            for field in ('market', 'high', 'mid', 'low'):
+                if row is None or not self._priced[row]:
+                    record[field] = 'no data'
+                else:
+                    value = self.catalog.price_values(finish, field)[row]
+                    record[field] = '-' if np.isnan(value) else str(float(value))
+            repriced.append(record)
+        return repriced
+
+    def sort_rows(self, rows, sort_by, card_type='Normal', descending=True):
+        """Reorders ranked row ids by one of SORT_KEYS; ties keep their ranked order and unpriced cards go last."""
+        if sort_by == 'relevance':
+            return rows
+        table = self.table
+        if sort_by == 'release_date':
+            values = table.set_dates[table.set_codes[rows]]
+        elif sort_by == 'set':
+            values = table.set_name_ranks[table.set_codes[rows]]
+        else:
+            values = self.catalog.price_values(CARD_TYPES.get(card_type, 'normal'), sort_by)[rows]
+        # NaN sorts last whether or not it is negated
+        return rows[np.argsort(-values if descending else values, kind='stable')]
+
+    def ordered(self, input_str, card_type='Normal', cancelled=None, row_filter=None, sort_by='relevance', descending=True):
+        """Ranked (and sorted) row ids of a query; the last one is cached, so paging through it doesn't search again."""
+        finish = CARD_TYPES.get(card_type, 'normal') if sort_by not in ('relevance', 'release_date', 'set') else None
+        key = (input_str, sort_by, descending, finish)
+        last = self._last_order
+        if last is not None and last[0] == key and last[1] is row_filter:
+            return last[2]
+        rows = self.rank(input_str, cancelled, row_filter)
+        with span('sorting'):
+            rows = self.sort_rows(rows, sort_by, card_type, descending)
+        self._last_order = (key, row_filter, rows)
+        return rows
+
+    def clear_cache(self):
+        """Forgets the ranked and sorted rows of the last search, so the next search ranks and sorts again.
+
+        The narrowing of a query that extends the previous one is kept, as it
+        is part of how a single search-as-you-type query is answered.
+        """
+        self._last_order = None
+
+    def search(self, input_str, card_type='Normal', page=0, page_size=None, cancelled=None, row_filter=None,
+               sort_by='relevance', descending=True):
+        """Returns ranked result records for a query, optionally sorted by one of SORT_KEYS and just one page of them."""
+        rows = self.ordered(input_str, card_type, cancelled, row_filter, sort_by, descending)
+        if cancelled and cancelled():
+            raise SearchCancelled(input_str)
+        if page_size:
+            start_index = page_size * page
+            rows = rows[start_index:start_index + page_size]
+        with span('records'):
+            return [card_record(self.table.card(row), card_type) for row in rows]
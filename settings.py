@@ -0,0 +1,31 @@
+"""Reading and writing config.ini."""
+import configparser
+
+CONFIG_FILE = "config.ini"
+
+
+def read_config():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config
+
+def write_ini_file(inventory_filename):
+    # Keep the other settings (log level, ...) when switching inventories
+    config = read_config()
+    config["DEFAULT"]["InventoryFile"] = inventory_filename
+    with open(CONFIG_FILE, "w") as configfile:
+        config.write(configfile)
+
+def read_ini_file():
+    """Reads the name of the inventory file from the .ini file."""
+    config = read_config()
+
+    return config["DEFAULT"]["InventoryFile"]
+
+def read_log_level():
+    """Reads the log level (DEBUG, INFO, WARNING, ...) from the .ini file, INFO if it isn't set."""
+    return read_config()["DEFAULT"].get("LogLevel", "INFO")
+
+def read_scoring_processes():
+    """Reads how many processes score fuzzy name matches from the .ini file, 0 (no pool) if it isn't set."""
+    return read_config()["DEFAULT"].getint("ScoringProcesses", 0)
@@ -0,0 +1,128 @@
+"""Memory-mapped catalog store shared by every CardLog instance on a machine.
+
+After a catalog is read from the xlsx, its CardTable and price table are
+written next to it (pokemon_card_data.store/) as plain files:
+
+    <field>.npy                    fixed-width arrays (codes, dates, prices)
+    <field>.bin                    UTF-8 bytes of every string, back to back
+    <field>.offsets.npy            where each string starts and ends in .bin
+    <field>.nulls.npy              which entries are missing
+    manifest.json                  format version and the xlsx's size and mtime
+
+Other instances open the store with mmap instead of parsing the xlsx, so
+the data is shared through the OS page cache. The store is rewritten when
+the xlsx changes.
+"""
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from catalog import Catalog, CardTable, PRICE_COLUMNS
+
+STORE_VERSION = 2
+
+
+def store_path(catalog_path):
+    return os.path.splitext(catalog_path)[0] + '.store'
+
+def source_stamp(catalog_path):
+    stat = os.stat(catalog_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+class StringTable:
+    """Read-only sequence of strings kept as one UTF-8 blob plus an offset table."""
+    def __init__(self, blob, offsets, nulls):
+        self.blob = blob
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def open(cls, directory, name):
+        path = os.path.join(directory, name + '.bin')
+        # An empty file can't be mapped
+        blob = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+        return cls(blob, np.load(os.path.join(directory, name + '.offsets.npy'), mmap_mode='r'),
+                   np.load(os.path.join(directory, name + '.nulls.npy'), mmap_mode='r'))
+
+    @property
+    def nbytes(self):
+        return self.blob.nbytes + self.offsets.nbytes + self.nulls.nbytes
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def __getitem__(self, index):
+        if self.nulls[index]:
+            return None
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+def write_strings(directory, name, values):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    nulls = np.zeros(len(values), dtype=bool)
+    with open(os.path.join(directory, name + '.bin'), 'wb') as f:
+        position = 0
+        for index, value in enumerate(values):
+            if isinstance(value, str):
+                encoded = value.encode('utf-8')
+                f.write(encoded)
+                position += len(encoded)
+            else:
+                nulls[index] = True
+            offsets[index + 1] = position
+    np.save(os.path.join(directory, name + '.offsets.npy'), offsets)
+    np.save(os.path.join(directory, name + '.nulls.npy'), nulls)
+
+
+def save_store(catalog):
+    """Writes the catalog's CardTable and prices to its store; failures are logged, not raised."""
+    directory = store_path(catalog.path)
+    building = f"{directory}.tmp{os.getpid()}"
+    try:
+        table = catalog.card_table()
+        os.makedirs(building, exist_ok=True)
+        for name in CardTable.ARRAY_FIELDS:
+            np.save(os.path.join(building, name + '.npy'), getattr(table, name))
+        for name in CardTable.ROW_STRING_FIELDS + CardTable.LOOKUP_FIELDS:
+            write_strings(building, name, getattr(table, name))
+        np.save(os.path.join(building, 'prices.npy'), catalog.prices()[PRICE_COLUMNS].to_numpy(dtype=np.float64))
+        with open(os.path.join(building, 'manifest.json'), 'w') as f:
+            json.dump({'version': STORE_VERSION, 'rows': len(table), 'price_columns': PRICE_COLUMNS,
+                       **source_stamp(catalog.path)}, f)
+
+        # Fails on Windows while another instance has the old store mapped; that store then stays as it is
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(building, directory)
+        logging.info('Wrote the shared catalog store %s.', directory)
+    except OSError:
+        logging.exception('Could not write the shared catalog store %s.', directory)
+        shutil.rmtree(building, ignore_errors=True)
+
+def open_store(catalog_path):
+    """Opens the catalog from its store, or returns None if there is no store for the current xlsx."""
+    directory = store_path(catalog_path)
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        stamp = source_stamp(catalog_path)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get('version') != STORE_VERSION or manifest.get('price_columns') != PRICE_COLUMNS
+            or manifest.get('size') != stamp['size'] or manifest.get('mtime') != stamp['mtime']):
+        return None
+
+    fields = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name in CardTable.ARRAY_FIELDS}
+    fields.update({name: StringTable.open(directory, name) for name in CardTable.ROW_STRING_FIELDS})
+    # The lookup tables are one entry per distinct value, small enough to decode
+    fields.update({name: list(StringTable.open(directory, name)) for name in CardTable.LOOKUP_FIELDS})
+    prices = pd.DataFrame(np.load(os.path.join(directory, 'prices.npy'), mmap_mode='r'), columns=PRICE_COLUMNS, copy=False)
+    logging.info('Opened the shared catalog store %s.', directory)
+    return Catalog(path=catalog_path, card_table=CardTable.from_fields(fields), prices=prices)
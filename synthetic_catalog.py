@@ -0,0 +1,149 @@
+"""Generates synthetic card catalogs shaped like pokemon_card_data.xlsx for benchmarking.
+
+The set, images and tcgplayer columns hold the same repr strings the SDK
+objects produce, so every regex in the app sees realistic input.
+"""
+import random
+
+import pandas as pd
+
+from catalog import CARD_TYPES, FINISHES, price_column
+from inventory import INVENTORY_COLUMNS
+
+SYLLABLES = ['char', 'iz', 'ard', 'pik', 'a', 'chu', 'bul', 'ba', 'saur', 'squir', 'tle', 'mew', 'two', 'gar',
+             'do', 'on', 'ee', 'vee', 'lu', 'cari', 'o', 'gen', 'gar', 'dra', 'gon', 'ite', 'snor', 'lax', 'ray', 'quaz']
+PREFIXES = ['', '', '', '', 'Radiant ', 'Dark ', 'Shining ', 'Galarian ', "Team Rocket's "]
+SUFFIXES = ['', '', '', '', ' ex', ' EX', ' GX', ' V', ' VMAX', ' VSTAR']
+SERIES = ['Base', 'Gym', 'Neo', 'E-Card', 'EX', 'Diamond & Pearl', 'Platinum', 'HeartGold & SoulSilver',
+          'Black & White', 'XY', 'Sun & Moon', 'Sword & Shield', 'Scarlet & Violet']
+RARITIES = ['Common', 'Uncommon', 'Rare', 'Rare Holo', 'Rare Holo V', 'Rare Ultra', 'Rare Secret', 'Promo']
+SUPERTYPES = ['Pokémon', 'Pokémon', 'Pokémon', 'Trainer', 'Energy']
+TYPES = ['Fire', 'Water', 'Grass', 'Lightning', 'Psychic', 'Fighting', 'Darkness', 'Metal', 'Colorless']
+ATTACK_NAMES = ['Ember', 'Tackle', 'Thunder Shock', 'Hydro Pump', 'Psybeam', 'Slash', 'Flamethrower', 'Quick Attack']
+FINISH_COMBOS = [['normal', 'reverseHolofoil'], ['holofoil', 'reverseHolofoil'], ['holofoil'], ['normal'],
+                 ['firstEditionNormal', 'normal'], ['firstEditionHolofoil', 'holofoil'], []]
+
+
+def price_repr(rng):
+    market = round(rng.lognormvariate(0, 1.5), 2)
+    low = round(market * rng.uniform(0.4, 0.9), 2)
+    mid = round(market * rng.uniform(0.9, 1.3), 2)
+    high = round(market * rng.uniform(1.5, 6), 2)
+    direct_low = round(market * rng.uniform(0.8, 1.1), 2) if rng.random() < 0.3 else None
+    return f"TCGPrice(low={low}, mid={mid}, high={high}, market={market}, directLow={direct_low})", (low, mid, high, market, direct_low)
+
+def attacks_repr(rng, energy):
+    attacks = []
+    for _ in range(rng.randint(1, 2)):
+        cost = [energy] * rng.randint(1, 3)
+        attacks.append(f"Attack(name='{rng.choice(ATTACK_NAMES)}', cost={cost!r}, convertedEnergyCost={len(cost)}, "
+                       f"damage='{rng.randint(1, 12) * 10}', text='Flip a coin. If heads, this attack does 20 more damage.')")
+    return f"[{', '.join(attacks)}]"
+
+def make_sets(rng, count):
+    sets = []
+    for i in range(count):
+        set_id = f"set{i}"
+        series = SERIES[i * len(SERIES) // count]
+        name = f"{series} {rng.choice(['Base Set', 'Legends', 'Storm', 'Path', 'Origins', 'Fates'])} {i}"
+        if i % 7 == 0:
+            name = f"Champion's {name}"  # Apostrophes make the repr switch to double quotes
+        printed_total = rng.randint(60, 250)
+        release_date = f"{1999 + i * 25 // count}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}"
+        name_repr = f'"{name}"' if "'" in name else f"'{name}'"
+        set_repr = (f"Set(id='{set_id}', images=SetImage(symbol='https://images.pokemontcg.io/{set_id}/symbol.png', "
+                    f"logo='https://images.pokemontcg.io/{set_id}/logo.png'), legalities=Legality(unlimited='Legal', "
+                    f"expanded=None, standard=None), name={name_repr}, printedTotal={printed_total}, ptcgoCode=None, "
+                    f"releaseDate='{release_date}', series='{series}', total={printed_total + 10}, updatedAt='2023/08/21 10:00:00')")
+        sets.append({'id': set_id, 'name': name, 'series': series, 'printedTotal': printed_total,
+                     'releaseDate': release_date, 'repr': set_repr})
+    return sets
+
+def make_names(rng, count):
+    names = set()
+    while len(names) < count:
+        base = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(rng.choice(PREFIXES) + base + rng.choice(SUFFIXES))
+    return sorted(names)
+
+def generate_catalog(size, seed=0, flat=False):
+    """Returns a DataFrame of `size` synthetic cards; `flat` adds the ingest pipeline's flat columns."""
+    rng = random.Random(seed)
+    sets = make_sets(rng, max(10, size // 150))
+    names = make_names(rng, max(50, size // 8))
+
+    rows = []
+    for i in range(size):
+        card_set = sets[i * len(sets) // size]
+        number = str(rng.randint(1, card_set['printedTotal'] + 20))
+        card_id = f"{card_set['id']}-{number}-{i}"
+        images = (f"CardImage(small='https://images.pokemontcg.io/{card_set['id']}/{number}.png', "
+                  f"large='https://images.pokemontcg.io/{card_set['id']}/{number}_hires.png')")
+
+        finishes = rng.choice(FINISH_COMBOS)
+        prices = {}
+        if finishes or rng.random() < 0.5:
+            price_reprs = []
+            for finish in FINISHES:
+                if finish in finishes:
+                    text, prices[finish] = price_repr(rng)
+                    price_reprs.append(f"{finish}={text}")
+                else:
+                    price_reprs.append(f"{finish}=None")
+            tcgplayer = (f"TCGPlayer(url='https://prices.pokemontcg.io/tcgplayer/{card_id}', updatedAt='2023/08/21', "
+                         f"prices=TCGPrices({', '.join(price_reprs)}))")
+        else:
+            tcgplayer = None
+
+        energy = rng.choice(TYPES)
+        row = {
+            'id': card_id,
+            'name': rng.choice(names),
+            'number': number,
+            'rarity': rng.choice(RARITIES),
+            'supertype': rng.choice(SUPERTYPES),
+            'hp': str(rng.randint(3, 34) * 10),
+            'types': str([energy]),
+            'attacks': attacks_repr(rng, energy),
+            'weaknesses': f"[Weakness(type='{rng.choice(TYPES)}', value='×2')]",
+            'retreatCost': str(['Colorless'] * rng.randint(0, 3)),
+            'artist': rng.choice(['Ken Sugimori', 'Mitsuhiro Arita', '5ban Graphics', 'Atsuko Nishida']),
+            'set': card_set['repr'],
+            'images': images,
+            'tcgplayer': tcgplayer,
+            'nationalPokedexNumbers': str([rng.randint(1, 1010)]),
+            'flavorText': "A synthetic card generated for benchmarking.",
+        }
+        if flat:
+            row.update({'set_id': card_set['id'], 'set_name': card_set['name'], 'set_series': card_set['series'],
+                        'set_printedTotal': card_set['printedTotal'], 'set_releaseDate': card_set['releaseDate'],
+                        'images_small': f"https://images.pokemontcg.io/{card_set['id']}/{number}.png",
+                        'images_large': f"https://images.pokemontcg.io/{card_set['id']}/{number}_hires.png",
+                        'tcgplayer_url': f"https://prices.pokemontcg.io/tcgplayer/{card_id}" if tcgplayer else None,
+                        'tcgplayer_updatedAt': '2023/08/21' if tcgplayer else None})
+            for finish in FINISHES:
+                for field, value in zip(['low', 'mid', 'high', 'market', 'directLow'], prices.get(finish, [None] * 5)):
+                    row[price_column(finish, field)] = value
+        rows.append(row)
+
+    columns = list(rows[0]) if rows else []
+    return pd.DataFrame(rows, columns=columns)
+
+def generate_inventory(catalog_df, size, seed=0):
+    """Returns an inventory DataFrame of `size` lines drawn from a (synthetic) catalog."""
+    rng = random.Random(seed)
+    card_types = list(CARD_TYPES)
+    sample = catalog_df.sample(n=size, replace=size > len(catalog_df), random_state=seed)
+    inventory = pd.DataFrame({
+        'Name': sample['name'].to_numpy(),
+        'ID': sample['id'].to_numpy(),
+        'Series': 'Synthetic',
+        'Release Date': '2023/08/21',
+        'Market Price': '-',
+        'High Price': '-',
+        'Mid Price': '-',
+        'Low Price': '-',
+        'Card Type': [rng.choice(card_types) for _ in range(size)],
+        'Count': [rng.randint(1, 4) for _ in range(size)],
+    })
+    return inventory[INVENTORY_COLUMNS]
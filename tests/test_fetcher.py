@@ -0,0 +1,103 @@
+"""CatalogFetcher against a local mock of the card API that fails some requests the way the real one does."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from fetcher import CatalogFetcher, FetchError
+
+CARDS = [{'id': f"set{i // 100}-{i % 100}", 'name': f"Card {i}"} for i in range(1234)]
+
+
+class MockApi(ThreadingHTTPServer):
+    """Serves CARDS a page at a time; `failures` maps a page to the statuses its first requests get."""
+    def __init__(self, failures=None, total_count=True):
+        super().__init__(('127.0.0.1', 0), MockApiHandler)
+        self.failures = {page: list(statuses) for page, statuses in (failures or {}).items()}
+        self.total_count = total_count
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page, page_size = int(query['page'][0]), int(query['pageSize'][0])
+        with self.server.lock:
+            self.server.requests += 1
+            statuses = self.server.failures.get(page)
+            status = statuses.pop(0) if statuses else None
+        if status is not None:
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+
+        body = {'data': CARDS[(page - 1) * page_size:page * page_size], 'page': page, 'pageSize': page_size}
+        if self.server.total_count:
+            body['totalCount'] = len(CARDS)
+        encoded = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**options):
+        server = MockApi(**options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def fetcher(server, **options):
+    return CatalogFetcher(api_key='', base_url=server.url, page_size=100, backoff=0.001, max_backoff=0.01,
+                          requests_per_second=0, timeout=5, progress=lambda *args: None, **options)
+
+def sequential_walk(server, page_size=100):
+    """Every card, fetched one page after another until a page comes back empty."""
+    cards, page = [], 1
+    while True:
+        items = requests.get(f"{server.url}/cards", params={'page': page, 'pageSize': page_size}, timeout=5).json()['data']
+        if not items:
+            return cards
+        cards.extend(items)
+        page += 1
+
+
+def test_concurrent_fetch_with_retries_matches_sequential_walk(serve):
+    server = serve(failures={1: [503], 2: [429, 429], 5: [500, 502, 503], 13: [504]})
+    with fetcher(server, max_workers=4) as client:
+        cards = client.fetch_all()
+    assert cards == sequential_walk(server) == CARDS
+    assert client.pages_done == client.total_pages == 13
+    assert all(not statuses for statuses in server.failures.values())
+
+def test_fetch_without_total_count_walks_pages(serve):
+    server = serve(failures={3: [429]}, total_count=False)
+    with fetcher(server) as client:
+        assert client.fetch_all() == sequential_walk(server)
+
+def test_page_failing_every_retry_raises(serve):
+    server = serve(failures={4: [503] * 10})
+    with fetcher(server, max_workers=2, max_retries=2) as client:
+        with pytest.raises(FetchError, match="Page 4 failed after 3 attempts: HTTP 503"):
+            client.fetch_all()
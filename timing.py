@@ -0,0 +1,89 @@
+"""Lightweight per-phase timing spans aggregated into latency histograms.
+
+    with span('name match'):
+        ...
+
+    print(timings.report())
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds; the last bucket catches everything slower
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+SAMPLES_KEPT = 2000
+
+
+class PhaseStats:
+    """Latency histogram and recent samples for one phase."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=SAMPLES_KEPT)
+        self.total_ms = 0.0
+        self.calls = 0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.samples.append(ms)
+        self.total_ms += ms
+        self.calls += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class Timings:
+    """Thread-safe registry of PhaseStats, keyed by phase name in first-seen order."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    def add(self, phase, ms):
+        with self.lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = PhaseStats()
+            stats.add(ms)
+
+    def reset(self):
+        with self.lock:
+            self.phases = {}
+
+    def summary(self):
+        """Returns {phase: {'calls', 'p50', 'p95', 'p99', 'mean'}} in milliseconds."""
+        with self.lock:
+            return {phase: {'calls': stats.calls, 'p50': stats.percentile(50), 'p95': stats.percentile(95),
+                            'p99': stats.percentile(99), 'mean': stats.total_ms / stats.calls}
+                    for phase, stats in self.phases.items()}
+
+    def histogram(self, phase):
+        """Returns [(bucket label, count)] for one phase."""
+        with self.lock:
+            counts = list(self.phases[phase].counts) if phase in self.phases else [0] * (len(BUCKETS_MS) + 1)
+        labels = [f"<={bound:g}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g}ms"]
+        return list(zip(labels, counts))
+
+    def report(self, histograms=False):
+        lines = [f"{'phase':<18}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}"]
+        for phase, stats in self.summary().items():
+            lines.append(f"{phase:<18}{stats['calls']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}"
+                         f"{stats['p99']:>10.2f}{stats['mean']:>10.2f}")
+            if histograms:
+                lines += [f"    {label:>10} {count}" for label, count in self.histogram(phase) if count]
+        return "\n".join(lines)
+
+
+timings = Timings()
+
+@contextmanager
+def span(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, (time.perf_counter() - start) * 1000)
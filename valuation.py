@@ -0,0 +1,130 @@
+"""Values an inventory against the catalog's current prices."""
+import numpy as np
+import pandas as pd
+
+from catalog import CARD_TYPES
+
+
+class CollectionValue:
+    """Result of valuing a collection: per-line values plus the usual rollups."""
+    def __init__(self, lines, field):
+        self.lines = lines
+        self.field = field
+        self.total = lines['Value'].sum()
+        self.by_set = lines.groupby('Set')['Value'].sum().sort_values(ascending=False)
+        self.by_finish = lines.groupby('Card Type')['Value'].sum().sort_values(ascending=False)
+        self.cards = int(lines['Count'].sum())
+        self.unpriced = int(lines.loc[lines['Unit Price'].isna(), 'Count'].sum())
+
+    def summary(self, top_sets=10):
+        lines = [f"Total {self.field} value: ${self.total:,.2f} ({self.cards} cards, {self.unpriced} without a price)", "", "By card type:"]
+        lines += [f"  {card_type}: ${value:,.2f}" for card_type, value in self.by_finish.items()]
+        lines += ["", "Top sets:"]
+        lines += [f"  {set_name}: ${value:,.2f}" for set_name, value in self.by_set.head(top_sets).items()]
+        return "\n".join(lines)
+
+
+def value_collection(inventory, catalog, field='market'):
+    """Values every inventory line at the catalog's `field` price for its finish, times Count.
+
+    The whole inventory is joined against the price matrix in one merge on
+    (ID, finish), so there is no per-row lookup.
+    """
+    lines = pd.DataFrame({
+        'ID': inventory['ID'].astype(str).to_numpy(),
+        'Card Type': inventory['Card Type'].to_numpy(),
+        'Count': pd.to_numeric(inventory['Count'], errors='coerce').fillna(0).astype(int).to_numpy(),
+    })
+    lines['finish'] = lines['Card Type'].map(CARD_TYPES)
+
+    prices = catalog.price_matrix()[['id', 'finish', field]].rename(columns={'id': 'ID', field: 'Unit Price'})
+    lines = lines.merge(prices, on=['ID', 'finish'], how='left')
+
+    sets = pd.Series(catalog.set_names().to_numpy(), index=catalog.ids())
+    sets = sets[~sets.index.duplicated()]
+    lines['Set'] = lines['ID'].map(sets).fillna("Unknown Set")
+    lines['Value'] = lines['Unit Price'].fillna(0) * lines['Count']
+    return CollectionValue(lines, field)
+
+
+# Inventory price columns and the catalog price field each one is refreshed from
+PRICE_COLUMN_FIELDS = {'Market Price': 'market', 'High Price': 'high', 'Mid Price': 'mid', 'Low Price': 'low'}
+
+
+def format_price(value):
+    # Same text the search table shows, so refreshed rows look like freshly added ones
+    return '-' if pd.isna(value) else str(value)
+
+def price_number(text):
+    return pd.to_numeric(text, errors='coerce')
+
+
+class RepriceReport:
+    """What a price refresh changed."""
+    def __init__(self, changes, rows_total):
+        self.changes = changes
+        self.rows_total = rows_total
+        self.rows_changed = len(changes)
+        self.value_change = changes['Value Change'].sum()
+
+    def summary(self, top=10):
+        lines = [f"{self.rows_changed} of {self.rows_total} rows repriced, collection market value changed by ${self.value_change:+,.2f}."]
+        if self.rows_changed:
+            biggest = self.changes.reindex(self.changes['Value Change'].abs().sort_values(ascending=False).index).head(top)
+            lines += ["", "Biggest changes:"]
+            lines += [f"  {row['Name']} ({row['Card Type']}): {row['Old Market Price']} -> {row['Market Price']} ({row['Value Change']:+,.2f})"
+                      for _, row in biggest.iterrows()]
+        return "\n".join(lines)
+
+
+def refresh_prices(inventory, catalog):
+    """Returns (repriced inventory, RepriceReport) with every price column set from the current catalog.
+
+    All rows are repriced in one merge against the price matrix. Rows whose
+    card and finish have no catalog price keep their old values.
+    """
+    inventory = inventory.reset_index(drop=True)
+    keys = pd.DataFrame({'ID': inventory['ID'].astype(str).to_numpy(),
+                         'finish': inventory['Card Type'].map(CARD_TYPES).to_numpy()})
+    fields = list(PRICE_COLUMN_FIELDS.values())
+    prices = catalog.price_matrix()[['id', 'finish'] + fields].rename(columns={'id': 'ID'})
+    current = keys.merge(prices, on=['ID', 'finish'], how='left')
+
+    # A row changes when a price differs as a number, so a cell holding 80 matches a catalog 80.0 (and '-' matches no price)
+    priced = current[fields].notna().any(axis=1).to_numpy()
+    differs = {}
+    for column, field in PRICE_COLUMN_FIELDS.items():
+        old = price_number(inventory[column]).to_numpy(dtype=float) if column in inventory.columns else np.full(len(inventory), np.nan)
+        new = current[field].to_numpy(dtype=float)
+        differs[column] = priced & ~((old == new) | (np.isnan(old) & np.isnan(new)))
+    changed = np.logical_or.reduce(list(differs.values()))
+
+    # Only the changed rows get new text; the others keep the cells as they were
+    repriced = inventory.copy()
+    for column, field in PRICE_COLUMN_FIELDS.items():
+        if column not in repriced.columns:
+            repriced[column] = '-'
+        new_text = current[field].map(format_price).to_numpy()
+        repriced[column] = repriced[column].astype(object).where(~(changed & priced), new_text)
+
+    count = pd.to_numeric(inventory['Count'], errors='coerce').fillna(0)
+    old_market = price_number(inventory.get('Market Price', pd.Series('-', index=inventory.index)))
+    new_market = price_number(repriced['Market Price'])
+    changes = pd.DataFrame({
+        'Name': inventory.get('Name', keys['ID']),
+        'ID': keys['ID'],
+        'Card Type': inventory['Card Type'],
+        'Old Market Price': inventory.get('Market Price', '-'),
+        'Market Price': repriced['Market Price'],
+        'Value Change': (new_market.fillna(0) - old_market.fillna(0)) * count,
+    })[changed]
+    return repriced, RepriceReport(changes, len(inventory))
+
+def refresh_inventory_file(inventory_path, catalog):
+    """Reprices an inventory file in place with a single read and a single write."""
+    inventory = pd.read_excel(inventory_path)
+    repriced, report = refresh_prices(inventory, catalog)
+    if report.rows_changed:
+        repriced.to_excel(inventory_path, index=False)
+    return report
+